@@ -0,0 +1,41 @@
+"""
+Show that parsing with behaviors takes time linear in the number of
+components.
+
+Run from the repository root: python benchmarks/behavior_assignment.py [EVENTS ...]
+
+Each calendar is parsed with its VERSION line first, where behaviors are
+assigned as lines are read, and last, where the finished calendar is
+cascaded over.  The time per event should stay flat as calendars grow.
+"""
+
+import sys
+
+from binary_format import best
+from calendars import calendarText
+
+import vobject
+
+VERSION_LINE = "VERSION:2.0\r\n"
+END_LINE = "END:VCALENDAR\r\n"
+
+
+def versionLast(text):
+    """Return text with its VERSION line moved to the end of the calendar."""
+    text = text.replace(VERSION_LINE, "", 1)
+    return text[: -len(END_LINE)] + VERSION_LINE + END_LINE
+
+
+def main(*sizes):
+    print(f"{'events':>8}  {'VERSION first':>22}  {'VERSION last':>22}")
+    for events in sizes or (1000, 2000, 4000, 8000):
+        text = calendarText(events, alarms=True)
+        columns = []
+        for variant in (text, versionLast(text)):
+            seconds = best(lambda: vobject.readOne(variant))
+            columns.append(f"{seconds:7.3f}s {seconds / events * 1e6:7.1f}us/event")
+        print(f"{events:8}  {columns[0]:>22}  {columns[1]:>22}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,51 @@
+"""
+Compare vobject.binary with pickle and with parsing the text again.
+
+Run from the repository root: python benchmarks/binary_format.py [EVENTS]
+
+tzinfos built from a VTIMEZONE can't be pickled, so pickle is only timed
+on a calendar in UTC.
+"""
+
+import pickle
+import sys
+import time
+
+from calendars import calendarText
+
+import vobject
+import vobject.binary
+
+
+def best(function, repeat=3):
+    """Return the best time of repeat calls to function, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(label, seconds, size=None):
+    print(f"  {label:<14}{seconds:7.3f}s" + (f"  {size} bytes" if size is not None else ""))
+
+
+def main(events=5000):
+    for timezone in (True, False):
+        text = calendarText(events, timezone)
+        for lazyNative in (False, True):
+            calendar = vobject.readOne(text, lazyNative=lazyNative)
+            dumped = vobject.binary.dumps([calendar])
+            print(f"{events} events, {'VTIMEZONE' if timezone else 'UTC'}, lazyNative={lazyNative}")
+            report("parse", best(lambda: vobject.readOne(text, lazyNative=lazyNative)))
+            report("binary.dumps", best(lambda: vobject.binary.dumps([calendar])), len(dumped))
+            report("binary.loads", best(lambda: vobject.binary.loads(dumped)))
+            if not timezone:
+                pickled = pickle.dumps(calendar, pickle.HIGHEST_PROTOCOL)
+                report("pickle.dumps", best(lambda: pickle.dumps(calendar, pickle.HIGHEST_PROTOCOL)), len(pickled))
+                report("pickle.loads", best(lambda: pickle.loads(pickled)))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""Generate calendars for the benchmarks."""
+
+HEAD = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//vobject//benchmarks//EN\r\n"
+
+VTIMEZONE = (
+    "BEGIN:VTIMEZONE\r\n"
+    "TZID:Europe/Berlin\r\n"
+    "BEGIN:STANDARD\r\n"
+    "DTSTART:19701025T030000\r\n"
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU\r\n"
+    "TZOFFSETFROM:+0200\r\n"
+    "TZOFFSETTO:+0100\r\n"
+    "END:STANDARD\r\n"
+    "BEGIN:DAYLIGHT\r\n"
+    "DTSTART:19700329T020000\r\n"
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU\r\n"
+    "TZOFFSETFROM:+0100\r\n"
+    "TZOFFSETTO:+0200\r\n"
+    "END:DAYLIGHT\r\n"
+    "END:VTIMEZONE\r\n"
+)
+
+EVENT = (
+    "BEGIN:VEVENT\r\n"
+    "UID:event-{i}@example.com\r\n"
+    "DTSTAMP:20240101T000000Z\r\n"
+    "DTSTART{tz}:2024{month:02}{day:02}T090000{z}\r\n"
+    "DTEND{tz}:2024{month:02}{day:02}T100000{z}\r\n"
+    "SUMMARY:Meeting {i}\r\n"
+    "LOCATION:Room {room}\r\n"
+    "ORGANIZER;CN=Organizer {room}:mailto:organizer{room}@example.com\r\n"
+    "ATTENDEE;CN=Attendee {i};PARTSTAT=ACCEPTED:mailto:attendee{i}@example.com\r\n"
+    "CATEGORIES:Work,Meeting\r\n"
+    "STATUS:CONFIRMED\r\n"
+    "TRANSP:OPAQUE\r\n"
+    "{alarm}"
+    "END:VEVENT\r\n"
+)
+
+VALARM = "BEGIN:VALARM\r\nACTION:DISPLAY\r\nDESCRIPTION:Reminder\r\nTRIGGER:-PT15M\r\nEND:VALARM\r\n"
+
+
+def calendarText(events, timezone=True, alarms=False):
+    """
+    Return the text of a VCALENDAR with events VEVENTs, in a VTIMEZONE's
+    timezone if timezone is True, in UTC otherwise, each with a VALARM if
+    alarms is True.
+    """
+    tz, z = (";TZID=Europe/Berlin", "") if timezone else ("", "Z")
+    alarm = VALARM if alarms else ""
+    body = "".join(
+        EVENT.format(i=i, month=i % 12 + 1, day=i % 28 + 1, room=i % 20, tz=tz, z=z, alarm=alarm) for i in range(events)
+    )
+    return HEAD + (VTIMEZONE if timezone else "") + body + "END:VCALENDAR\r\n"
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+import vobject
+import vobject.aio
+
+calendar_text = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Example//Example//EN\r\n"
+    + "".join(
+        "BEGIN:VEVENT\r\n"
+        f"UID:event-{i}@example.com\r\n"
+        "DTSTAMP:20240101T000000Z\r\n"
+        f"DTSTART:2024010{i}T090000Z\r\n"
+        f"SUMMARY:Meeting {i}\r\n"
+        "END:VEVENT\r\n"
+        for i in range(1, 6)
+    )
+    + "END:VCALENDAR\r\n"
+)
+
+
+class Writer:
+    def __init__(self):
+        self.chunks = []
+        self.drains = 0
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    async def drain(self):
+        self.drains += 1
+
+
+def test_read_components_async():
+    """
+    Components are read from a StreamReader and from an async iterator
+    """
+
+    async def fromReader():
+        reader = asyncio.StreamReader()
+        reader.feed_data(calendar_text.encode("utf-8") * 2)
+        reader.feed_eof()
+        return [c async for c in vobject.aio.readComponentsAsync(reader, chunkSize=64)]
+
+    async def pieces():
+        for i in range(0, len(calendar_text), 10):
+            yield calendar_text[i : i + 10]
+
+    async def fromIterator():
+        return [c async for c in vobject.aio.readComponentsAsync(pieces(), yieldAt=["VEVENT"])]
+
+    calendars = asyncio.run(fromReader())
+    assert len(calendars) == 2
+    assert calendars[1].serialize() == vobject.readOne(calendar_text).serialize()
+
+    *events, calendar = asyncio.run(fromIterator())
+    assert [event.summary.value for event in events] == [f"Meeting {i}" for i in range(1, 6)]
+    assert calendar.name == "VCALENDAR"
+
+
+def test_read_empty_async():
+    """
+    An empty stream has no components
+    """
+
+    async def fromReader():
+        reader = asyncio.StreamReader()
+        reader.feed_eof()
+        return [c async for c in vobject.aio.readComponentsAsync(reader)]
+
+    assert asyncio.run(fromReader()) == []
+
+
+def test_read_unclosed_async():
+    """
+    An unclosed component is reported at the last line, as by readComponents
+    """
+
+    async def pieces():
+        yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"
+        yield "BEGIN:VEVENT\r\nUID:1\r\n"
+
+    async def read():
+        return [c async for c in vobject.aio.readComponentsAsync(pieces())]
+
+    with pytest.raises(vobject.base.ParseError) as e:
+        asyncio.run(read())
+    assert e.value.lineNumber == 4
+
+
+def test_aserialize():
+    """
+    aserialize writes the same text as serialize, in bounded chunks
+    """
+    calendar = vobject.readOne(calendar_text)
+    writer = Writer()
+    asyncio.run(vobject.aio.aserialize(calendar, writer, chunkSize=100))
+    assert b"".join(writer.chunks).decode("utf-8") == calendar.serialize()
+    assert len(writer.chunks) > 2 and writer.drains == len(writer.chunks)
+
+
+def test_aserialize_cancelled():
+    """
+    Cancelling aserialize stops the serializing thread while it waits to hand over a chunk
+    """
+
+    class StuckWriter(Writer):
+        async def drain(self):
+            await asyncio.Event().wait()
+
+    async def cancelled():
+        writer = StuckWriter()
+        task = asyncio.create_task(vobject.aio.aserialize(vobject.readOne(calendar_text), writer, chunkSize=10))
+        while not writer.chunks:
+            await asyncio.sleep(0.01)
+        # the thread is now blocked on the full queue
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await asyncio.wait_for(task, 5)
+        except asyncio.CancelledError:
+            return len(writer.chunks)
+        return None
+
+    assert asyncio.run(cancelled()) == 1
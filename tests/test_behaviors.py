@@ -1,4 +1,5 @@
 import datetime
+from unittest import mock
 
 import vobject
 
@@ -64,3 +65,37 @@ def test_period_behavior():
 
     line.value.append((datetime.datetime(2006, 5, 16, 10), two_hours))
     assert line.serialize().strip() == "TEST:20060216T100000/PT2H,20060516T100000/PT2H"
+
+
+def test_child_behaviors():
+    """
+    Child behavior tables are cached per parent behavior and dropped when a
+    behavior is registered
+    """
+    calendar = vobject.base.getBehavior("VCALENDAR")
+    table = vobject.base.childBehaviors(calendar)
+    assert table["VEVENT"] == (vobject.icalendar.VEvent, True, vobject.icalendar.VEvent.defaultBehavior)
+    assert vobject.base.childBehaviors(calendar) is table
+
+    class XTestBehavior(vobject.behavior.Behavior):
+        name = "X-TEST-CHILD-BEHAVIOR"
+
+    # restore the registry and the cached tables, so later tests don't see the behavior
+    registry = getattr(vobject.components, "__behaviorRegistry")
+    with mock.patch.dict(registry), mock.patch.dict(vobject.base.behaviorTables):
+        vobject.base.registerBehavior(XTestBehavior)
+        assert vobject.base.childBehaviors(calendar) is not table
+    assert XTestBehavior.name not in registry
+    assert vobject.base.childBehaviors(calendar) is table
+
+    # the cascade assigns known, default and component behaviors
+    cal = vobject.readOne(
+        "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nBEGIN:VEVENT\r\nUID:1\r\nX-FOO:bar\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n",
+        transform=False,
+    )
+    event = cal.vevent
+    assert event.behavior is vobject.icalendar.VEvent
+    assert event.uid.behavior is vobject.icalendar.TextBehavior
+    assert event.x_foo.behavior is vobject.icalendar.VEvent.defaultBehavior
+    assert event.uid.parentBehavior is vobject.icalendar.VEvent
+    assert cal.add("vevent").behavior is vobject.icalendar.VEvent
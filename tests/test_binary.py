@@ -0,0 +1,80 @@
+import datetime
+
+import pytest
+
+import vobject
+import vobject.binary
+
+card_text = (
+    "BEGIN:VCARD\r\n"
+    "VERSION:3.0\r\n"
+    "FN:Jane Doe\r\n"
+    "N:Doe;Jane;;;\r\n"
+    "TEL;TYPE=WORK,VOICE:+1-555-0100\r\n"
+    "TEL;TYPE=WORK,VOICE:+1-555-0101\r\n"
+    "END:VCARD\r\n"
+)
+
+
+def test_round_trip():
+    """
+    Native values, timezones, params and behaviors survive a round trip
+    """
+    with open("test_files/ms_tzid.ics", encoding="utf-8") as f:
+        text = f.read()
+    cal, card = vobject.readOne(text), vobject.readOne(card_text)
+    cal.vevent.add("rdate").value = [datetime.datetime(2008, 6, 1, 15), datetime.datetime(2008, 6, 2, 15)]
+    cal.vevent.add("recurrence-id").value = datetime.date(2008, 6, 2)
+    cal.vevent.add("duration").value = datetime.timedelta(hours=1)
+    loaded = vobject.binary.loads(vobject.binary.dumps([cal, card]))
+    assert [component.serialize() for component in loaded] == [cal.serialize(), card.serialize()]
+
+    loadedCal, loadedCard = loaded
+    dtstart = loadedCal.vevent.dtstart.value
+    assert dtstart == cal.vevent.dtstart.value
+    assert dtstart.tzinfo is cal.vevent.dtstart.value.tzinfo
+    assert loadedCal.vevent.rdate.value == cal.vevent.rdate.value
+    assert loadedCal.vevent.recurrence_id.value == datetime.date(2008, 6, 2)
+    assert loadedCal.vevent.behavior is cal.vevent.behavior
+    assert type(loadedCal.vtimezone) is type(cal.vtimezone)
+    assert loadedCard.n.value.family == "Doe"
+    assert loadedCard.tel.params == {"TYPE": ["WORK", "VOICE"]}
+    # lines with the same raw params share them, as after parsing
+    card = vobject.readOne(card_text, keepText=True)
+    first, second = vobject.binary.loads(vobject.binary.dumps([card]))[0].tel_list
+    assert type(first._params) is tuple and first._params is second._params
+    # and keep their original text
+    assert second.originalText() == "TEL;TYPE=WORK,VOICE:+1-555-0101"
+
+
+def test_utc_kinds():
+    """
+    The standard library's UTC and icalendar's load as themselves
+    """
+    cal = vobject.iCalendar()
+    event = cal.add("vevent")
+    event.add("dtstart").value = datetime.datetime(2024, 1, 2, 9, tzinfo=datetime.timezone.utc)
+    event.add("dtend").value = datetime.datetime(2024, 1, 2, 10, tzinfo=vobject.icalendar.utc)
+    (loaded,) = vobject.binary.loads(vobject.binary.dumps([cal]))
+    assert loaded.vevent.dtstart.value.tzinfo is datetime.timezone.utc
+    assert loaded.vevent.dtend.value.tzinfo is vobject.icalendar.utc
+
+
+def test_pending_work_is_kept():
+    """
+    Decoding and lazy transformation still pending aren't run by dumping or loading
+    """
+    with open("test_files/ms_tzid.ics", encoding="utf-8") as f:
+        cal = vobject.readOne(f.read(), lazyNative=True)
+    (loaded,) = vobject.binary.loads(vobject.binary.dumps([cal]))
+    assert cal.vevent.dtstart._isNative is None
+    assert loaded.vevent.dtstart._isNative is None
+    assert loaded.vevent.dtstart.value.utcoffset() == datetime.timedelta(hours=10)
+
+
+def test_format_error():
+    with pytest.raises(vobject.binary.FormatError):
+        vobject.binary.loads(b"not a dump")
+    data = vobject.binary.dumps([vobject.readOne(card_text)])
+    with pytest.raises(vobject.binary.FormatError):
+        vobject.binary.loads(data[:7] + bytes((vobject.binary.FORMAT_VERSION + 1,)) + data[8:])
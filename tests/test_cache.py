@@ -0,0 +1,62 @@
+import vobject.cache
+
+calendar_text = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Example//Example//EN\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:event@example.com\r\n"
+    "DTSTAMP:20240101T000000Z\r\n"
+    "DTSTART:20240102T090000Z\r\n"
+    "CATEGORIES:WORK,MEETING\r\n"
+    "SUMMARY;LANGUAGE=en:Meeting\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_parse_cache():
+    """
+    Hits return independent forks of the cached components
+    """
+    cache = vobject.cache.ParseCache()
+    first = cache.readOne(calendar_text)
+    first.vevent.categories.value.append("CHANGED")
+    first.vevent.summary.params["LANGUAGE"] = ["fr"]
+    first.vevent.summary.value = "Changed"
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    second = cache.readOne(calendar_text.encode("utf-8"))
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.vevent.categories.value == ["WORK", "MEETING"]
+    assert second.vevent.summary.params == {"LANGUAGE": ["en"]}
+    assert second.serialize() == vobject.readOne(calendar_text).serialize()
+
+    # options are part of the key
+    raw = cache.readOne(calendar_text, transform=False)
+    assert raw.vevent.dtstart.value == "20240102T090000Z"
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+
+    # equal limits share an entry
+    cache.readOne(calendar_text, limits=vobject.base.ParseLimits(maxDepth=5))
+    cache.readOne(calendar_text, limits=vobject.base.ParseLimits(maxDepth=5))
+    assert (cache.hits, cache.misses, len(cache)) == (2, 3, 3)
+
+
+def test_parse_cache_eviction():
+    """
+    Entries are evicted least recently used first, by count and by size
+    """
+    texts = [calendar_text.replace("Meeting", f"Meeting {i}") for i in range(3)]
+    cache = vobject.cache.ParseCache(maxEntries=2)
+    for text in texts + texts[2:] + texts[:1]:
+        cache.readOne(text)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 4, 2)
+
+    cache = vobject.cache.ParseCache(maxBytes=len(calendar_text) + 10)
+    cache.readOne(texts[0])
+    cache.readOne(texts[1])
+    assert len(cache) == 1 and cache.size == len(texts[1])
+    cache = vobject.cache.ParseCache(maxBytes=10)
+    cache.readOne(texts[0])
+    assert len(cache) == 0 and cache.misses == 1
@@ -230,3 +230,112 @@ def test_ical_to_hcal():
     #        </span>
     #    """
     # )
+
+
+def test_serialize_leaves_tree_alone():
+    """
+    Serializing doesn't transform or re-parse native values
+    """
+    cal = vobject.base.readOne(simple_2_0_test % vobject.VERSION)
+    dtstart = cal.vevent.dtstart
+    start = dtstart.value
+    cal.vevent.description.value = "Comma, semicolon; backslash\\"
+    first = cal.serialize()
+    assert "DESCRIPTION:Comma\\, semicolon\\; backslash\\\\\r\n" in first
+    assert cal.serialize() == first
+    assert dtstart.value is start and dtstart.isNative
+    assert dtstart.params == {}
+    assert cal.vevent.description.value == "Comma, semicolon; backslash\\"
+    assert not cal.vevent.description.encoded
+
+
+def test_unchanged_lines_pass_through():
+    """
+    Parsed lines are written as they were read until they're changed
+    """
+    text = (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        "PRODID:-//Example//Example//EN\r\n"
+        "BEGIN:VEVENT\r\n"
+        "UID:pass-through@example.com\r\n"
+        "DTSTAMP:20240101T000000Z\r\n"
+        "dtstart;VALUE=DATE-TIME:20240102T090000Z\r\n"
+        "SUMMARY;X-B=2;X-A=1:Kept\\, as is\r\n"
+        "DESCRIPTION:Changed\r\n"
+        "LOCATION;LANGUAGE=en:Room\r\n"
+        "CATEGORIES:A,B\r\n"
+        "END:VEVENT\r\n"
+        "END:VCALENDAR\r\n"
+    )
+    assert vobject.readOne(text).vevent.summary.originalText() is None
+    cal = vobject.readOne(text, keepText=True)
+    event = cal.vevent
+    assert event.dtstart.value == datetime.datetime(2024, 1, 2, 9, tzinfo=datetime.timezone.utc)
+    event.description.value = "New description"
+    event.location.params["LANGUAGE"] = ["fr"]
+    event.categories.value.append("C")
+    out = cal.serialize()
+    assert "dtstart;VALUE=DATE-TIME:20240102T090000Z\r\n" in out
+    assert "SUMMARY;X-B=2;X-A=1:Kept\\, as is\r\n" in out
+    assert "DESCRIPTION:New description\r\n" in out
+    assert "LOCATION;LANGUAGE=fr:Room\r\n" in out
+    assert "CATEGORIES:A,B,C\r\n" in out
+    assert event.summary.originalText() == "SUMMARY;X-B=2;X-A=1:Kept\\, as is"
+    assert event.description.originalText() is None
+
+
+def test_quoted_printable_lines_are_encoded():
+    """
+    Quoted-printable lines are encoded again, whether they were read or not
+    """
+    text = (
+        "BEGIN:VCARD\r\n"
+        "VERSION:2.1\r\n"
+        "N:Doe;John;;;\r\n"
+        "FN:John Doe\r\n"
+        "NOTE;ENCODING=QUOTED-PRINTABLE:A long note that is=\r\n"
+        " split with a soft line break\r\n"
+        "END:VCARD\r\n"
+    )
+    unread = vobject.readOne(text, allowQP=True, keepText=True)
+    out = unread.serialize()
+    assert out.count("\n") == out.count("\r\n")
+    assert unread.note.originalText() is None
+    read = vobject.readOne(text, allowQP=True, keepText=True)
+    assert read.note.value == "A long note that is split with a soft line break"
+    assert read.serialize() == out
+
+
+def test_output_buffer():
+    """
+    serialize writes text or bytes in blocks, whatever buf takes
+    """
+
+    class BytesSink:
+        def __init__(self):
+            self.blocks = []
+
+        def write(self, data):
+            if not isinstance(data, bytes):
+                raise TypeError("bytes expected")
+            self.blocks.append(data)
+
+    cal = vobject.base.readOne(simple_2_0_test % vobject.VERSION)
+    text = cal.serialize()
+    assert isinstance(text, str)
+
+    buf = io.BytesIO()
+    assert cal.serialize(buf) is buf
+    assert buf.getvalue() == text.encode("utf-8")
+
+    sink = BytesSink()
+    cal.serialize(sink)
+    assert sink.blocks == [text.encode("utf-8")]
+
+    buf = io.StringIO()
+    outbuf = vobject.output.OutputBuffer(buf, blockSize=100)
+    cal.serialize(outbuf)
+    assert 0 < len(buf.getvalue()) < len(text)
+    outbuf.flush()
+    assert buf.getvalue() == text and outbuf.binary is False
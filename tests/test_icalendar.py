@@ -384,6 +384,64 @@ def test_timezone_serializing():
     ev.dtstart.value = datetime.datetime(2005, 10, 12, 9, tzinfo=apple)
 
 
+def test_calendar_writer():
+    """
+    CalendarWriter streams components and adds the VTIMEZONEs they need
+    """
+    tzs = dateutil.tz.tzical(io.StringIO(timezones))
+    pacific, santiago = tzs.get("US/Pacific"), tzs.get("Santiago")
+
+    def event(i, tzinfo):
+        ev = vobject.newFromBehavior("vevent")
+        ev.add("uid").value = f"{i}@example.com"
+        ev.add("dtstamp").value = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        ev.add("dtstart").value = datetime.datetime(2024, 1, 2, 9, tzinfo=tzinfo)
+        return ev
+
+    out = io.StringIO()
+    with vobject.icalendar.CalendarWriter(out, method="PUBLISH") as writer:
+        assert out.getvalue() == (
+            f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{vobject.icalendar.PRODID}\r\nMETHOD:PUBLISH\r\n"
+        )
+        writer.write(event(1, pacific))
+        assert out.getvalue().endswith("END:VEVENT\r\n")
+        writer.write(event(2, pacific))
+        writer.write(event(3, datetime.timezone.utc))
+        # components without a behavior get the one they would in a VCALENDAR
+        todo = vobject.base.Component("VTODO")
+        todo.add("uid").value = "4@example.com"
+        writer.write(todo)
+        assert todo.behavior is vobject.icalendar.VTodo
+    text = out.getvalue()
+    assert text.endswith("END:VTIMEZONE\r\nEND:VCALENDAR\r\n")
+    assert text.index("BEGIN:VTIMEZONE") > text.index("BEGIN:VTODO")
+    cal = vobject.readOne(text)
+    assert [tz.tzid.value for tz in cal.vtimezone_list] == ["US/Pacific"]
+    assert [ev.uid.value for ev in cal.vevent_list] == ["1@example.com", "2@example.com", "3@example.com"]
+    assert cal.vevent.dtstart.value == datetime.datetime(2024, 1, 2, 9, tzinfo=pacific)
+
+    # timezones given up front come first and aren't repeated
+    out = io.StringIO()
+    with vobject.icalendar.CalendarWriter(out, timezones=[santiago]) as writer:
+        writer.write(event(5, santiago))
+    cal = vobject.readOne(out.getvalue())
+    assert [tz.tzid.value for tz in cal.vtimezone_list] == ["Santiago"]
+    assert out.getvalue().index("BEGIN:VTIMEZONE") < out.getvalue().index("BEGIN:VEVENT")
+
+    with pytest.raises(vobject.base.VObjectError):
+        writer.write(event(6, santiago))
+
+    # every item of a multi-valued line counts
+    out = io.StringIO()
+    with vobject.icalendar.CalendarWriter(out) as writer:
+        ev = event(7, datetime.timezone.utc)
+        ev.add("exdate").value = [datetime.datetime(2024, 1, 9, 9, tzinfo=santiago)]
+        writer.write(ev)
+    cal = vobject.readOne(out.getvalue())
+    assert [tz.tzid.value for tz in cal.vtimezone_list] == ["Santiago"]
+    assert cal.vevent.exdate.value == [datetime.datetime(2024, 1, 9, 9, tzinfo=santiago)]
+
+
 def test_pytz_timezone_serializing():
     """
     Serializing with timezones from pytz test
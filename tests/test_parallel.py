@@ -0,0 +1,77 @@
+import vobject
+import vobject.parallel
+
+with open("test_files/ms_tzid.ics") as f:
+    calendar_head, _, rest = f.read().partition("BEGIN:VEVENT\n")
+# with a DTSTAMP, so serializing doesn't depend on the current time
+event = "BEGIN:VEVENT\nDTSTAMP:20080501T000000Z\n" + rest.partition("END:VEVENT\n")[0] + "END:VEVENT\n"
+
+
+def test_split_calendar(tmp_path):
+    """
+    A large VCALENDAR is split between workers, and VTIMEZONEs reach all of them
+    """
+    events = "".join(event.replace("CommaTest", f"CommaTest{i}") for i in range(50))
+    path = tmp_path / "big.ics"
+    path.write_text(calendar_head + events + "END:VCALENDAR\n")
+
+    jobs = vobject.parallel.planJobs(path.read_bytes(), 500)
+    assert len(jobs) == 1 and jobs[0][0] and len(jobs[0][1]) > 2
+
+    (cal,) = vobject.parallel.readComponents(path, workers=2, chunkSize=500)
+    assert [ev.uid.value for ev in cal.vevent_list] == [f"CommaTest{i}" for i in range(50)]
+    dtstart = cal.vevent_list[-1].dtstart.value
+    assert dtstart.utcoffset().total_seconds() == 10 * 3600
+    assert cal.serialize() == vobject.readOne(path.read_text()).serialize()
+
+    (cal,) = vobject.parallel.readComponents(path, workers=2, chunkSize=500, lazyNative=True)
+    assert cal.vevent_list[-1].dtstart.value == dtstart
+
+    # where is checked against the split calendar itself, not its events
+    assert not list(vobject.parallel.readComponents(path, workers=2, chunkSize=500, where="PRODID contains Apple"))
+    (cal,) = vobject.parallel.readComponents(path, workers=2, chunkSize=500, where="PRODID contains Outlook")
+    assert len(cal.vevent_list) == 50
+
+
+def test_many_components(tmp_path):
+    """
+    Top level components come back in their original order
+    """
+    cards = "".join(
+        f"BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Person {i}\r\nN:Person;{i};;;\r\nEND:VCARD\r\n" for i in range(40)
+    )
+    path = tmp_path / "book.vcf"
+    path.write_text(cards, newline="")
+    parsed = list(vobject.parallel.readComponents(path, workers=2, chunkSize=300))
+    assert [card.fn.value for card in parsed] == [f"Person {i}" for i in range(40)]
+    parsed = list(vobject.parallel.readComponents(path, workers=2, chunkSize=300, where="N = Person;7;;;"))
+    assert [card.fn.value for card in parsed] == ["Person 7"]
+
+
+def test_bounded_submission():
+    """
+    Only a few tasks are submitted ahead of the result being used
+    """
+
+    class Pool:
+        submitted = 0
+
+        def submit(self, *args):
+            self.submitted += 1
+            return args
+
+    pool = Pool()
+    jobs = [(False, [([(i, i + 1)], None)]) for i in range(10)]
+    for i, (split, last, future) in enumerate(vobject.parallel.submitted(pool, "path", jobs, {}, {}, 3)):
+        assert pool.submitted <= i + 3
+        assert future[2] == [(i, i + 1)] and last and not split
+    assert pool.submitted == 10
+
+
+def test_empty_file(tmp_path):
+    """
+    An empty file has no components
+    """
+    path = tmp_path / "empty.ics"
+    path.write_bytes(b"")
+    assert not list(vobject.parallel.readComponents(path, workers=2))
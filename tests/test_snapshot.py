@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+import vobject.binary
+import vobject.snapshot
+
+
+def test_snapshot(tmp_path):
+    """
+    A snapshot is saved next to the source, and used until the source changes
+    """
+    path = tmp_path / "cal.ics"
+    with open("test_files/ms_tzid.ics", "rb") as f:
+        path.write_bytes(f.read())
+    snapshot = tmp_path / "cal.ics.snapshot"
+
+    (cal,) = vobject.snapshot.readComponents(path)
+    assert snapshot.stat().st_mode & 0o777 == path.stat().st_mode & 0o666
+    (loaded,) = vobject.snapshot.readComponents(path)
+    assert loaded.vevent.dtstart.value == cal.vevent.dtstart.value
+    assert loaded.vevent.dtstart.value.utcoffset().total_seconds() == 10 * 3600
+    assert loaded.serialize() == cal.serialize()
+
+    # the snapshot is keyed by the options
+    (raw,) = vobject.snapshot.readComponents(path, transform=False)
+    assert raw.vevent.dtstart.value == "20080530T150000"
+
+    # and by the source's modification time and size
+    path.write_bytes(path.read_bytes().replace(b"CommaTest", b"Changed"))
+    (changed,) = vobject.snapshot.readComponents(path)
+    assert changed.vevent.uid.value == "Changed"
+
+    # a corrupt snapshot is replaced
+    snapshot.write_bytes(b"VOBJSNAP garbage")
+    (cal,) = vobject.snapshot.readComponents(path)
+    assert cal.vevent.uid.value == "Changed"
+    assert vobject.snapshot.load(snapshot, vobject.snapshot.sourceKey(path.stat(), {})) is not None
+
+
+def test_snapshot_failures(tmp_path, monkeypatch):
+    """
+    Expected failures to save or load a snapshot are reported, other errors raised
+    """
+    card = vobject.readOne("BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Name\r\nN:Name;;;;\r\nEND:VCARD\r\n")
+    card.add("x-lock").value = threading.Lock()
+    path = tmp_path / "card.vcf.snapshot"
+    assert not vobject.snapshot.save(path, (), [card])
+    assert not list(tmp_path.iterdir())
+
+    assert vobject.snapshot.save(path, (), [])
+    assert vobject.snapshot.load(path, ()) == []
+
+    def broken(data):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(vobject.binary, "loads", broken)
+    with pytest.raises(RuntimeError):
+        vobject.snapshot.load(path, ())
@@ -62,3 +62,55 @@ def test_parse_line():
     )
     with pytest.raises(vobject.base.ParseError):
         vobject.base.parseLine(":")
+
+
+def test_parse_line_matches_regex():
+    """
+    The fast path of parseLine agrees with line_re and parseParams
+    """
+    lines = [
+        "X;:value",
+        "X;;A=1:value",
+        "X;A=b=c,,d;B:value:with:colons",
+        "X;A,b;C=:value",
+        "item1.X_Y;A=:",
+        "X;A;;B:value",
+        "X;A b=c:value",
+        "a.b.c:value",
+        "X;A=\n:value",
+        'X;A="q:uoted",b:value',
+    ]
+    for line in lines:
+        match = vobject.base.line_re.match(line)
+        if match is None:
+            with pytest.raises(vobject.base.ParseError):
+                vobject.base.parseLine(line)
+        else:
+            assert vobject.base.parseLine(line) == (
+                match.group("name").replace("_", "-"),
+                vobject.base.parseParams(match.group("params")),
+                match.group("value"),
+                match.group("group"),
+            )
+
+
+def test_fold_one_line():
+    """
+    Folded lines stay within lineLength bytes without splitting characters
+    """
+    buf = io.StringIO()
+    vobject.base.foldOneLine(buf, "SUMMARY:" + "ab" * 40)
+    lines = buf.getvalue().split("\r\n")
+    assert lines == ["SUMMARY:" + "ab" * 33 + "a", " " + "ba" * 6 + "b", ""]
+
+    text = "DESCRIPTION:" + "€ 𝄞 é " * 30
+    buf = io.StringIO()
+    vobject.base.foldOneLine(buf, text, 20)
+    lines = buf.getvalue().split("\r\n")
+    assert max(len(line.encode("utf-8")) for line in lines) <= 20
+    assert "".join(line[1:] if i else line for i, line in enumerate(lines)) == text
+
+    # lines shorter than lineLength characters are left alone, bytes buffers get UTF-8
+    buf = io.BytesIO()
+    vobject.base.foldOneLine(buf, "X:" + "é" * 10, 20)
+    assert buf.getvalue() == ("X:" + "é" * 10 + "\r\n").encode("utf-8")
@@ -1,4 +1,8 @@
 import datetime
+import io
+import itertools
+import pathlib
+import pickle
 
 import pytest
 
@@ -142,6 +146,11 @@ def test_bad_stream():
     with pytest.raises(vobject.base.ParseError):
         vobject.base.readOne(bad_stream)
 
+    # an unclosed component is reported at the last line
+    with pytest.raises(vobject.base.ParseError) as e:
+        vobject.base.readOne("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nBEGIN:VEVENT\r\nUID:1\r\n")
+    assert e.value.lineNumber == 4
+
 
 def test_bad_line():
     """
@@ -173,3 +182,381 @@ def test_quoted_printable():
     vobjs = vobject.base.readComponents(quoted_printable, allowQP=True)
     for vo in vobjs:
         assert vo is not None
+
+
+def test_logical_lines_chunked():
+    """
+    Folds and CRLFs split across read chunks are unfolded the same way
+    """
+    expected = list(vobject.base.getLogicalLines(io.StringIO(standard_test_text), False))
+    for chunk_size in (1, 2, 3, 7, 64):
+        stream = io.StringIO(standard_test_text + "X-FOLDED:one\r\n two\r\n\tthree\r\n")
+        lines = list(vobject.base.getLogicalLines(stream, False, chunk_size))
+        assert lines[:-1] == expected
+        assert lines[-1] == ("X-FOLDED:onetwothree", len(standard_test_text.splitlines()) + 1)
+
+
+def test_logical_line_numbers():
+    """
+    Logical lines are numbered from 1 by their first physical line, with or without allowQP
+    """
+    text = "BEGIN:VCARD\r\nN:a\r\n b\r\n\r\nNOTE;ENCODING=QUOTED-PRINTABLE:x=\r\ny\r\nFN:c\r\nEND:VCARD\r\n"
+    numbers = [n for _, n in vobject.base.getLogicalLines(io.StringIO(text), True)]
+    assert numbers == [1, 2, 5, 7, 8]
+    numbers = [n for _, n in vobject.base.getLogicalLines(io.StringIO(text), False)]
+    assert numbers == [1, 2, 5, 6, 7, 8]
+    with pytest.raises(vobject.base.ParseError) as error:
+        vobject.readOne("BEGIN:VCARD\r\nVERSION:2.1\r\n\r\nbroken\r\nEND:VCARD\r\n", allowQP=True)
+    assert error.value.lineNumber == 4
+
+
+def test_read_components_streams_input():
+    """
+    Components are yielded before the rest of the stream has been read
+    """
+
+    class CountingStream(io.StringIO):
+        consumed = 0
+
+        def read(self, size=-1):
+            data = super().read(size)
+            self.consumed += len(data)
+            return data
+
+    text = "".join(f"BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Person {i}\r\nEND:VCARD\r\n" for i in range(2000))
+    stream = CountingStream(text)
+    first = next(vobject.readComponents(stream))
+    assert first.fn.value == "Person 0"
+    assert stream.consumed < len(text)
+
+
+def test_yield_at():
+    """
+    Sub-components are yielded as soon as they end, timezones still apply
+    """
+    events = "".join(
+        f"BEGIN:VEVENT\r\nUID:event-{i}\r\nDTSTART;TZID=Test-Pacific:2002102{i}T140000\r\nEND:VEVENT\r\n"
+        for i in range(3)
+    )
+    text = (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        "PRODID:-//Test//EN\r\n"
+        "BEGIN:VTIMEZONE\r\n"
+        "TZID:Test-Pacific\r\n"
+        "BEGIN:STANDARD\r\n"
+        "DTSTART:19671029T020000\r\n"
+        "TZOFFSETFROM:-0700\r\n"
+        "TZOFFSETTO:-0800\r\n"
+        "END:STANDARD\r\n"
+        "END:VTIMEZONE\r\n" + events + "END:VCALENDAR\r\n"
+    )
+    components = vobject.readComponents(text, yieldAt=("vevent",))
+    first = next(components)
+    assert first.name == "VEVENT"
+    assert first.uid.value == "event-0"
+    assert first.dtstart.value.utcoffset() == datetime.timedelta(hours=-8)
+
+    rest = list(components)
+    assert [c.name for c in rest] == ["VEVENT", "VEVENT", "VCALENDAR"]
+    cal = rest[-1]
+    assert "vevent" not in cal.contents
+    assert cal.vtimezone.tzid.value == "Test-Pacific"
+
+    # options after allowQP are checked keyword arguments
+    with pytest.raises(TypeError):
+        next(vobject.readComponents(text, yeildAt=("vevent",)))
+
+
+def test_hostile_lines():
+    """
+    Broken lines fail quickly instead of backtracking
+    """
+    for line in ("X;" + "a=,,," * 1000 + '"', "X;A=" + "," * 1000 + '"x"y:v', 'X;A="' + "b" * 1000):
+        with pytest.raises(vobject.base.ParseError):
+            vobject.base.parseLine(line)
+
+
+def test_parse_limits():
+    """
+    Exceeding a ParseLimits limit raises ParseError
+    """
+    limits = vobject.base.ParseLimits(maxLineLength=100, maxParams=3, maxDepth=3, maxComponents=10)
+    c = vobject.readOne(standard_test_text, limits=limits)
+    assert c.vevent.valarm.action.value == "DISPLAY"
+
+    too_long = standard_test_text.replace("SUMMARY:Coffee with Jason", "SUMMARY:" + "x" * 60 + "\r\n " + "x" * 60)
+    too_many_params = standard_test_text.replace("SUMMARY:", "SUMMARY;A=1;B=2;C=3;D=4:")
+    too_deep = standard_test_text.replace("ACTION:DISPLAY\r\n", "BEGIN:X-A\r\nEND:X-A\r\n")
+    too_many = standard_test_text * 3
+    for text in (too_long, too_many_params, too_deep):
+        with pytest.raises(vobject.base.ParseError):
+            vobject.readOne(text, limits=limits)
+    with pytest.raises(vobject.base.ParseError):
+        list(vobject.readComponents(too_many, limits=limits))
+    with pytest.raises(vobject.base.ParseError):
+        list(vobject.readComponents(io.StringIO(too_long), allowQP=True, limits=limits))
+
+
+def test_lazy_decoding():
+    """
+    Params are unpacked and values decoded when a line is first used
+    """
+    c = vobject.readOne(standard_test_text.replace("Coffee with Jason", "Coffee\\, tea"))
+    summary = c.vevent.summary
+    assert summary._pending is summary.behavior
+    assert summary.value == "Coffee, tea"
+    assert not summary._pending and not summary.encoded
+
+    line = vobject.base.textLineToContentLine("NOTE;ENCODING=QUOTED-PRINTABLE;CHARSET=UTF-8:caf=C3=A9", 1)
+    assert type(line._params) is tuple
+    assert line.value == "café"
+    assert line.params == {"CHARSET": ["UTF-8"]}
+
+    line = vobject.base.textLineToContentLine("X-FOO;BAR=1:baz", 1)
+    line.value = "new"
+    assert line.bar_param == "1" and line.value == "new"
+
+
+def test_lazy_native():
+    """
+    With lazyNative, lines are transformed when first used
+    """
+    c = vobject.readOne(standard_test_text, lazyNative=True)
+    dtstart = c.vevent.dtstart
+    assert dtstart._isNative is None
+    assert c.vevent.summary.value == "Coffee with Jason"
+    assert dtstart._isNative is None
+    assert dtstart.value.tzinfo is not None
+    assert dtstart.isNative and "X-VOBJ-ORIGINAL-TZID" in dtstart.params
+    assert c.serialize() == vobject.readOne(standard_test_text).serialize()
+
+
+def test_slots():
+    """
+    Lines and components have no __dict__, and still pickle
+    """
+    c = vobject.readOne(standard_test_text)
+    assert not hasattr(c, "__dict__")
+    assert not hasattr(c.vevent, "__dict__")
+    assert not hasattr(c.vevent.summary, "__dict__")
+    assert c.vevent.summary._params is None
+    c = vobject.readOne(standard_test_text, transform=False)
+    assert pickle.loads(pickle.dumps(c)).serialize() == c.serialize()
+
+
+def test_read_bytes(tmp_path):
+    """
+    Bytes, binary streams and paths are decoded one logical line at a time
+    """
+    with open("test_files/tzid_8bit.ics", encoding="utf-8") as f:
+        text = f.read()
+    expected = vobject.readOne(text).vevent.dtstart.value
+    path = pathlib.Path("test_files/tzid_8bit.ics")
+    for source in (path, path.read_bytes(), io.BytesIO(path.read_bytes())):
+        assert vobject.readOne(source).vevent.dtstart.value == expected
+
+    # a fold in the middle of a UTF-8 sequence, a CHARSET and 8-bit data
+    data = (
+        b"BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Caf\xc3\r\n \xa9\r\n"
+        b"NOTE;CHARSET=ISO-8859-1:gr\xfc\xdfe\r\nTITLE:na\xefve\r\n"
+        b"ORG;X-CHARSET=KOI8-R:Caf\xc3\xa9\r\nROLE;charset=iso-8859-1:\xe9t\xe9\r\nEND:VCARD\r\n"
+    )
+    path = tmp_path / "card.vcf"
+    path.write_bytes(data)
+    for source in (data, path):
+        card = vobject.readOne(source)
+        assert card.fn.value == "Café"
+        assert card.note.value == "grüße"
+        assert card.title.value == "naïve"
+        # only a CHARSET parameter counts, whatever its case
+        assert card.org.value == ["Café"]
+        assert card.role.value == "été"
+
+
+def test_properties_projection():
+    """
+    Only whitelisted properties of the named components are kept
+    """
+    c = vobject.readOne(standard_test_text, properties={"vevent": ["uid", "dtstart", "rrule", "sequence"]})
+    event = c.vevent
+    assert sorted(event.contents) == ["dtstart", "rrule", "sequence", "uid", "valarm"]
+    assert event.dtstart.value.tzinfo is not None
+    assert event.valarm.description.value == "Event reminder, with comma\nand line feed"
+    assert c.prodid.value == "-//Apple Computer, Inc//iCal 1.0//EN"
+    assert len(list(event.getrruleset())) == 10
+
+    # skipped lines aren't parsed at all
+    text = "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Name\r\nbad.line;;=\r\nEND:VCARD\r\n"
+    card = vobject.readOne(text, properties={"VCARD": ["FN"]})
+    assert list(card.contents) == ["version", "fn"]
+
+
+def test_where_filter():
+    """
+    Components are filtered on raw property text before they're transformed
+    """
+    events = "".join(
+        f"BEGIN:VEVENT\r\nUID:{i}\r\nDTSTART:2026010{i}T090000Z\r\nCATEGORIES:{'Work' if i % 2 else 'Homework'},Misc\r\n"
+        "END:VEVENT\r\n"
+        for i in range(1, 6)
+    )
+    text = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + events + "END:VCALENDAR\r\n"
+
+    def uids(where):
+        *found, _ = vobject.readComponents(text, yieldAt=["VEVENT"], where=where)
+        return [event.uid.value for event in found]
+
+    assert uids("DTSTART >= 20260103") == ["3", "4", "5"]
+    assert uids("dtstart < 20260103") == ["1", "2"]
+    # one of the categories, not part of one
+    assert uids("CATEGORIES contains Work") == ["1", "3", "5"]
+    assert uids("CATEGORIES contains Homework") == ["2", "4"]
+    assert uids("CATEGORIES contains work") == []
+    assert vobject.builder.splitTextValues("A\\,B,C\\\\,D\\n") == ["A,B", "C\\", "D\\n"]
+    assert uids('UID != "2"') == ["1", "3", "4", "5"]
+    assert uids("LOCATION = Here") == []
+    assert uids(lambda event: event.uid.value in ("1", "5")) == ["1", "5"]
+    event, _ = vobject.readComponents(text, yieldAt=["VEVENT"], where="UID = 5")
+    assert event.dtstart.value.year == 2026
+
+    # without yieldAt, top level components are filtered
+    assert not list(vobject.readComponents(text, where="VERSION = 3.0"))
+    with pytest.raises(vobject.base.VObjectError):
+        vobject.readOne(text, where="DTSTART ~ 2026")
+
+
+def test_parse_events():
+    """
+    Callbacks see every component and line, with their encoded values
+    """
+    events = []
+    vobject.parseEvents(
+        standard_test_text,
+        onBegin=lambda name, group: events.append(("begin", name)),
+        onProperty=lambda name, params, value, n: events.append((name, params, value, n)),
+        onEnd=lambda name: events.append(("end", name)),
+    )
+    assert events[0] == ("begin", "VCALENDAR")
+    assert events[1] == ("CALSCALE", (), "GREGORIAN", 2)
+    assert ("DTSTART", (("TZID", "US/Pacific"),), "20021028T140000", 10) in events
+    assert ("DESCRIPTION", (), "Event reminder\\, with comma\\nand line feed", 19) in events
+    assert [e[1] for e in events if e[0] == "end"] == [
+        "VALARM",
+        "VEVENT",
+        "STANDARD",
+        "DAYLIGHT",
+        "VTIMEZONE",
+        "VCALENDAR",
+    ]
+
+    counts = {}
+    vobject.parseEvents(standard_test_text, onBegin=lambda name, group: counts.update({name: counts.get(name, 0) + 1}))
+    assert counts == {"VCALENDAR": 1, "VEVENT": 1, "VALARM": 1, "VTIMEZONE": 1, "STANDARD": 1, "DAYLIGHT": 1}
+    with pytest.raises(vobject.base.ParseError):
+        vobject.parseEvents("BEGIN:VCARD\r\nEND:VCALENDAR\r\n")
+
+
+def test_iter_tokens(tmp_path):
+    """
+    Tokens are generated lazily, and work with itertools
+    """
+    tokens = vobject.iterTokens(standard_test_text)
+    first = next(tokens)
+    assert first == (vobject.tokens.BEGIN, "VCALENDAR", None, (), None, 1)
+    assert first.kind == "BEGIN" and first.lineNumber == 1
+    props = [t.name for t in itertools.takewhile(lambda t: t.kind != "BEGIN", tokens)]
+    assert props == ["CALSCALE", "X-WR-TIMEZONE", "METHOD", "PRODID", "X-WR-CALNAME", "VERSION"]
+    token = next(t for t in tokens if t.name == "DTSTART")
+    assert token.params == (("TZID", "US/Pacific"),) and token.value == "20021028T140000"
+
+    # a path is mapped until the generator is closed
+    path = tmp_path / "cal.ics"
+    path.write_text(standard_test_text, newline="")
+    tokens = vobject.iterTokens(path)
+    assert next(tokens).name == "VCALENDAR"
+    tokens.close()
+    assert next(tokens, None) is None
+
+    # a broken line past the point consumed is never read
+    tokens = vobject.iterTokens("BEGIN:VCARD\r\nFN:Name\r\nbroken\r\nEND:VCARD\r\n")
+    assert [t.name for t in itertools.islice(tokens, 2)] == ["VCARD", "FN"]
+
+
+def test_interning(monkeypatch):
+    """
+    Names, contents keys, parameter names and common values are shared
+    between components
+    """
+    events = "".join(
+        f"BEGIN:VEVENT\r\nUID:{i}\r\ndtstart:2026010{i}T090000Z\r\nTRANSP:OPAQUE\r\nSUMMARY:Same\r\n"
+        f"ATTENDEE;CN=Guest {i}:mailto:guest{i}@example.com\r\nEND:VEVENT\r\n"
+        for i in range(1, 3)
+    )
+    cal = vobject.readOne("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + events + "END:VCALENDAR\r\n")
+    first, second = cal.vevent_list
+    assert first.dtstart.name == "DTSTART"
+    assert first.dtstart.name is second.dtstart.name
+    assert next(iter(first.contents)) is next(iter(second.contents))
+    assert first.transp.value == "OPAQUE"
+    assert first.transp.value is second.transp.value
+    assert next(iter(first.attendee.params)) is next(iter(second.attendee.params))
+    # values are only interned for the properties asked for
+    assert first.summary.value is not second.summary.value
+    cal = vobject.readOne("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + events + "END:VCALENDAR\r\n", internValues=["SUMMARY"])
+    first, second = cal.vevent_list
+    assert first.summary.value is second.summary.value
+    assert first.transp.value is not second.transp.value
+
+    # with yieldAt, tables that grow too large are emptied
+    monkeypatch.setattr(vobject.builder, "INTERN_TABLE_SIZE", 2)
+    statuses = ["CONFIRMED", "CONFIRMED", "A", "B", "C", "CONFIRMED"]
+    events = "".join(f"BEGIN:VEVENT\r\nUID:{i}\r\nSTATUS:{s}\r\nEND:VEVENT\r\n" for i, s in enumerate(statuses))
+    *vevents, _ = vobject.readComponents(
+        "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + events + "END:VCALENDAR\r\n", yieldAt=["VEVENT"]
+    )
+    values = [vevent.status.value for vevent in vevents]
+    assert values[0] is values[1]
+    assert values[-1] == values[0] and values[-1] is not values[0]
+
+
+def test_behavior_assignment():
+    """
+    Behaviors assigned while parsing match those cascaded over a finished
+    component, whether or not VERSION comes first
+    """
+    body = (
+        "BEGIN:VEVENT\r\nUID:1\r\nDTSTART:20260101T090000Z\r\nSUMMARY:One\\, two\r\nX-FOO:bar\r\n"
+        "BEGIN:VALARM\r\nACTION:DISPLAY\r\nTRIGGER:-PT15M\r\nEND:VALARM\r\nEND:VEVENT\r\n"
+    )
+    early = "BEGIN:VCALENDAR\r\nPRODID:-//x//x//EN\r\nVERSION:2.0\r\n" + body + "END:VCALENDAR\r\n"
+    late = "BEGIN:VCALENDAR\r\nPRODID:-//x//x//EN\r\n" + body + "VERSION:2.0\r\nEND:VCALENDAR\r\n"
+
+    def behaviors(component):
+        children = sorted(component.getChildren(), key=lambda child: child.name)
+        return [
+            (child.name, child.behavior, child.parentBehavior, getattr(child, "value", None)) for child in children
+        ] + [behaviors(child) for child in children if isinstance(child, vobject.base.Component)]
+
+    for kwargs in ({"transform": False}, {}):
+        expected = vobject.readOne(late, **kwargs)
+        cal = vobject.readOne(early, **kwargs)
+        assert cal.behavior is expected.behavior is vobject.icalendar.VCalendar2_0
+        assert behaviors(cal) == behaviors(expected)
+        assert cal.vevent.summary.value == "One, two"
+
+        expected = list(vobject.readComponents(late, yieldAt=["VEVENT"], **kwargs))
+        components = list(vobject.readComponents(early, yieldAt=["VEVENT"], **kwargs))
+        assert [behaviors(c) for c in components] == [behaviors(c) for c in expected]
+        assert components[0].valarm.behavior is vobject.icalendar.VAlarm
+
+
+def test_empty_input(tmp_path):
+    """
+    Empty input of any kind has no components and no tokens
+    """
+    path = tmp_path / "empty.ics"
+    path.write_bytes(b"")
+    for source in ("", b"", io.StringIO(""), io.BytesIO(b""), path):
+        assert not list(vobject.readComponents(source))
+    assert not list(vobject.iterTokens(""))
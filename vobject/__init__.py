@@ -78,6 +78,7 @@ VObject Overview
 
 from . import icalendar, vcard
 from .base import VERSION, newFromBehavior, readComponents, readOne
+from .tokens import iterTokens, parseEvents
 
 # Package version
 __version__ = VERSION
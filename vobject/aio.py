@@ -0,0 +1,167 @@
+"""Read and serialize vobjects without blocking an asyncio event loop."""
+
+import asyncio
+import concurrent.futures
+import threading
+
+from . import base, lexer, output
+from .builder import ComponentBuilder, ReadOptions
+
+WRITE_CHUNK_SIZE = 64 * 1024
+
+
+async def readChunks(stream, chunkSize):
+    """Generate chunks from an asyncio.StreamReader-like stream."""
+    while True:
+        chunk = await stream.read(chunkSize)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def logicalLinesAsync(chunks, chunkSize, allowQP, maxLineLength):
+    """
+    Generate (line, lineNumber) tuples from an async iterator of chunks,
+    as getLogicalLines does from a stream.
+
+    Chunks are split chunkSize characters at a time, and control goes back
+    to the event loop after each piece.
+    """
+    splitter = lexer.LineSplitter(maxLineLength)
+    unfolder = lexer.LineUnfolder(allowQP, maxLineLength)
+    async for data in chunks:
+        for start in range(0, len(data), chunkSize):
+            for line in splitter.push(data[start : start + chunkSize]):
+                logicalLine = unfolder.push(line)
+                if logicalLine is not None:
+                    yield logicalLine
+            await asyncio.sleep(0)
+    for line in splitter.finish():
+        logicalLine = unfolder.push(line)
+        if logicalLine is not None:
+            yield logicalLine
+    logicalLine = unfolder.finish()
+    if logicalLine is not None:
+        yield logicalLine
+
+
+async def readComponentsAsync(
+    stream,
+    validate=False,
+    transform=True,
+    ignoreUnreadable=False,
+    allowQP=False,
+    *,
+    chunkSize=lexer.READ_CHUNK_SIZE,
+    **options,
+):
+    """
+    Generate one Component at a time from an asynchronous stream.
+
+    stream is an asyncio.StreamReader, or anything else with an async read
+    method, or an async iterator of bytes or strings.  Other arguments are
+    the same as for base.readComponents.
+
+    Data is parsed chunkSize characters at a time, and control goes back to
+    the event loop after each chunk, so a large body doesn't stall other
+    tasks.
+    """
+    chunks = readChunks(stream, chunkSize) if hasattr(stream, "read") else stream
+    options = ReadOptions(**options)
+    builder = ComponentBuilder(validate, transform, ignoreUnreadable, options)
+    n = 0
+
+    try:
+        async for line, n in logicalLinesAsync(chunks, chunkSize, allowQP, options.limits.maxLineLength):
+            component = builder.push(line, n)
+            if component is not None:
+                yield component
+        component = builder.finish(n)
+        if component is not None:
+            yield component
+
+    except base.ParseError as e:
+        e.inputs = stream
+        raise
+
+
+class ChunkBuffer:
+    """
+    A write-only stream which hands chunks of text to an event loop.
+
+    Used by aserialize from an executor thread, behind an OutputBuffer which
+    collects the chunks.  write blocks until the loop has taken the previous
+    chunk, which is what bounds memory, or until cancel is called.
+    """
+
+    def __init__(self, queue, loop):
+        self.queue = queue
+        self.loop = loop
+        self.cancelled = False
+        # the put the thread is waiting on, guarded by lock against cancel
+        self.pending = None
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        if not isinstance(text, str):
+            # like io.StringIO, so OutputBuffer writes text
+            raise TypeError(f"string argument expected, got {type(text).__name__}")
+        self.put(text)
+
+    def put(self, item):
+        with self.lock:
+            if self.cancelled:
+                raise asyncio.CancelledError("aserialize was cancelled")
+            self.pending = asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+        try:
+            self.pending.result()
+        except concurrent.futures.CancelledError:
+            raise asyncio.CancelledError("aserialize was cancelled")
+
+    def cancel(self):
+        """Make the waiting write and any later one raise CancelledError."""
+        with self.lock:
+            self.cancelled = True
+            if self.pending is not None:
+                self.pending.cancel()
+
+
+async def aserialize(obj, writer, lineLength=75, validate=True, chunkSize=WRITE_CHUNK_SIZE, encoding="utf-8"):
+    """
+    Serialize obj to an asyncio.StreamWriter-like writer.
+
+    obj.serialize runs in the event loop's default executor, and its output
+    is written in chunks of about chunkSize characters, waiting for
+    writer.drain() after each one, so a slow reader holds serialization back
+    instead of letting output pile up in memory.  obj must not be changed
+    until aserialize returns.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=1)
+    buf = ChunkBuffer(queue, loop)
+
+    def serialize():
+        try:
+            outbuf = output.OutputBuffer(buf, chunkSize)
+            obj.serialize(outbuf, lineLength, validate)
+            outbuf.flush()
+        finally:
+            if not buf.cancelled:
+                buf.put(None)
+
+    done = loop.run_in_executor(None, serialize)
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            writer.write(chunk.encode(encoding))
+            await writer.drain()
+    except BaseException:
+        # wake the thread up, and wait for it to run into the cancelled buffer
+        buf.cancel()
+        await asyncio.wait((done,))
+        if not done.cancelled():
+            done.exception()
+        raise
+    await done
@@ -144,25 +144,15 @@ class Behavior:
         If validate is True, raise VObjectError if the line doesn't validate
         after implicit parameters are generated.
 
-        Default is to call base.defaultSerialize.
+        Default is to call base.defaultSerialize, which writes native values
+        without transforming obj itself.
 
         """
 
         cls.generateImplicitParameters(obj)
         if validate:
             cls.validate(obj, raiseException=True)
-
-        if obj.isNative:
-            transformed = obj.transformFromNative()
-            undoTransform = True
-        else:
-            transformed = obj
-            undoTransform = False
-
-        out = base.defaultSerialize(transformed, buf, lineLength)
-        if undoTransform:
-            obj.transformToNative()
-        return out
+        return base.defaultSerialize(obj, buf, lineLength)
 
     @classmethod
     def valueRepr(cls, line):
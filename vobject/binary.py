@@ -0,0 +1,434 @@
+"""
+A compact binary format for parsed components, faster to load than parsing
+or unpickling them, used between processes and in snapshots.
+
+Strings which repeat, like names, parameters and groups, are stored once in
+a table and referred to by index.  Behaviors are stored by their registered
+name and version, and classes by module and name.  Dates, datetimes, times
+and timedeltas are stored as numbers, with each distinct timezone stored
+once, as its VTIMEZONE text if it came from one.  dateutil's tzutc, used by
+icalendar, and the standard library's timezone.utc are told apart, so each
+loads as itself.  Pending decoding and lazy
+transformation are kept, so loading doesn't run them.  Values of other
+types, like vCard names, are pickled.  The tree itself is made of tuples
+and written with marshal.
+"""
+
+import datetime
+import importlib
+import marshal
+import pickle
+
+from . import base, icalendar
+
+MAGIC = b"VOBJBIN"
+# bumped when the format changes, loads refuses other versions
+FORMAT_VERSION = 4
+
+# value tags, every tuple in an encoded value starts with one
+LIST, TUPLE, DATETIME, DATE, TIME, TIMEDELTA, PICKLED = range(7)
+
+# timezone kinds, TZ_UTC being icalendar.utc and TZ_STDLIB_UTC datetime.timezone.utc
+TZ_UTC, TZ_VTIMEZONE, TZ_PICKLED, TZ_STDLIB_UTC = range(4)
+
+# value types stored as they are
+PLAIN_TYPES = frozenset((str, type(None), int, float, bool, bytes))
+
+# the slots Decoder.line sets, in order
+LINE_SLOTS = (
+    "name",
+    "group",
+    "behavior",
+    "parentBehavior",
+    "lineNumber",
+    "_isNative",
+    "_encoded",
+    "_value",
+    "_params",
+    "_singletonparams",
+    "_pending",
+    "_text",
+)
+
+
+class FormatError(base.VObjectError):
+    """Data isn't in this format, or in another version of it."""
+
+
+def tzinfoFromVtimezone(tzid, text):
+    """Return the tzinfo registered for tzid, registering text's VTIMEZONE if needed."""
+    tzinfo = icalendar.getTzid(tzid, False)
+    if tzinfo is None:
+        base.readOne(text).transformToNative()
+        tzinfo = icalendar.getTzid(tzid, False)
+    return tzinfo
+
+
+def vtimezonesIn(components):
+    """Generate the VTIMEZONEs among components and their children."""
+    for component in components:
+        if component.name == "VTIMEZONE":
+            yield component
+        elif isinstance(component, base.Component):
+            yield from component.contents.get("vtimezone", [])
+
+
+def registeredVtimezones(components):
+    """Map the ids of registered tzinfos to (tzid, VTIMEZONE text) tuples."""
+    vtimezones = {}
+    for timezone in vtimezonesIn(components):
+        tzid = timezone.getChildValue("tzid")
+        tzinfo = icalendar.getTzid(tzid, False) if tzid else None
+        if tzinfo is not None:
+            vtimezones[id(tzinfo)] = (tzid, timezone.serialize(validate=False))
+    return vtimezones
+
+
+def registerTimezones(components):
+    """
+    Register the tzinfos of the VTIMEZONEs among components.
+
+    Lines transformed lazily look up their TZIDs when they're used, so
+    components loaded with lazyNative need their timezones registered.
+    """
+    for timezone in vtimezonesIn(components):
+        if isinstance(timezone, icalendar.TimezoneComponent):
+            timezone.registerTzinfo(timezone.tzinfo)
+
+
+def slotSetter(cls, name):
+    """Return the setter of cls's slot name, faster than object.__setattr__."""
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__[name].__set__
+    raise AttributeError(name)
+
+
+def findClass(module, qualname):
+    """Return the class named qualname in module."""
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+class Encoder:
+    """
+    Encode a list of components, see dumps.
+
+    @ivar strings:
+        Maps interned strings to their index in the string table.
+    @ivar tzinfos:
+        Maps the ids of tzinfos to their index in the timezone table.
+    @ivar refs:
+        Maps behaviors and classes to their index in the reference table.
+    @ivar paramSets:
+        Maps raw params tuples, which lines often share, to their index in
+        the params table.
+    """
+
+    def __init__(self, components):
+        self.strings = {}
+        self.paramSets = {}
+        self.tzinfos = {}
+        self.tzTable = []
+        self.refs = {}
+        self.refTable = []
+        self.vtimezones = registeredVtimezones(components)
+
+    def string(self, s):
+        if s is None:
+            return -1
+        index = self.strings.get(s)
+        if index is None:
+            index = self.strings[s] = len(self.strings)
+        return index
+
+    def ref(self, obj):
+        """Return the index of a behavior or class, None being -1."""
+        if obj is None:
+            return -1
+        index = self.refs.get(obj)
+        if index is None:
+            name = getattr(obj, "name", None)
+            version = getattr(obj, "versionString", None)
+            if isinstance(name, str) and base.getBehavior(name, version) is obj:
+                entry = (True, name, version)
+            else:
+                entry = (False, obj.__module__, obj.__qualname__)
+            index = self.refs[obj] = len(self.refTable)
+            self.refTable.append(entry)
+        return index
+
+    def tzinfo(self, tzinfo):
+        if tzinfo is None:
+            return -1
+        index = self.tzinfos.get(id(tzinfo))
+        if index is None:
+            if tzinfo is icalendar.utc:
+                entry = (TZ_UTC,)
+            elif tzinfo is datetime.timezone.utc:
+                entry = (TZ_STDLIB_UTC,)
+            elif id(tzinfo) in self.vtimezones:
+                entry = (TZ_VTIMEZONE, *self.vtimezones[id(tzinfo)])
+            else:
+                entry = (TZ_PICKLED, pickle.dumps(tzinfo, pickle.HIGHEST_PROTOCOL))
+            index = self.tzinfos[id(tzinfo)] = len(self.tzTable)
+            self.tzTable.append(entry)
+        return index
+
+    def datetimeValue(self, value):
+        return (
+            DATETIME,
+            value.toordinal(),
+            value.hour * 3600 + value.minute * 60 + value.second,
+            value.microsecond,
+            self.tzinfo(value.tzinfo),
+            value.fold,
+        )
+
+    def dateValue(self, value):
+        return (DATE, value.toordinal())
+
+    def timedeltaValue(self, value):
+        return (TIMEDELTA, value.days, value.seconds, value.microseconds)
+
+    def timeValue(self, value):
+        return (TIME, value.hour, value.minute, value.second, value.microsecond, self.tzinfo(value.tzinfo))
+
+    def listValue(self, value):
+        return (LIST, *map(self.value, value))
+
+    def tupleValue(self, value):
+        return (TUPLE, *map(self.value, value))
+
+    # encoders of the types stored as numbers or nested values, by type
+    valueEncoders = {
+        datetime.datetime: datetimeValue,
+        datetime.date: dateValue,
+        datetime.timedelta: timedeltaValue,
+        datetime.time: timeValue,
+        list: listValue,
+        tuple: tupleValue,
+    }
+
+    def value(self, value):
+        cls = type(value)
+        if cls in PLAIN_TYPES:
+            return value
+        encode = self.valueEncoders.get(cls)
+        if encode is None:
+            return (PICKLED, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        return encode(self, value)
+
+    def line(self, line):
+        string = self.string
+        params = line._params
+        if type(params) is tuple:
+            # raw params, still shared with other lines
+            rawParams = params
+            params = self.paramSets.get(rawParams)
+            if params is None:
+                params = self.paramSets[rawParams] = len(self.paramSets)
+        elif params or line._singletonparams:
+            params = (
+                tuple((string(key), tuple(map(string, values))) for key, values in (params or {}).items()),
+                tuple(map(string, line._singletonparams or ())),
+            )
+        else:
+            params = None
+        # a pending decode is stored as its behavior's index
+        pending = line._pending
+        return (
+            string(line.name),
+            string(line.group),
+            self.ref(line.behavior),
+            self.ref(line.parentBehavior),
+            line.lineNumber,
+            line._isNative,
+            line._encoded,
+            self.value(line._value),
+            params,
+            pending if type(pending) is bool else self.ref(pending),
+            self.ref(type(line)),
+            line._text,
+        )
+
+    def component(self, component):
+        string = self.string
+        contents = tuple(
+            (string(key), tuple(self.node(child) for child in children)) for key, children in component.contents.items()
+        )
+        return (
+            self.ref(type(component)),
+            string(component.name),
+            string(component.group),
+            self.ref(component.behavior),
+            self.ref(component.parentBehavior),
+            component.useBegin,
+            component._isNative,
+            contents,
+        )
+
+    def node(self, obj):
+        if isinstance(obj, base.Component):
+            return (True, self.component(obj))
+        return (False, self.line(obj))
+
+    def encode(self, components):
+        nodes = tuple(self.node(component) for component in components)
+        string = self.string
+        paramSets = tuple(tuple(tuple(map(string, param)) for param in params) for params in self.paramSets)
+        tables = (tuple(self.strings), tuple(self.refTable), tuple(self.tzTable), paramSets)
+        return MAGIC + bytes((FORMAT_VERSION,)) + marshal.dumps((tables, nodes))
+
+
+class Decoder:
+    """Decode what Encoder encoded, see loads."""
+
+    def __init__(self, strings, refTable, tzTable, paramSets):
+        # index -1, for None, is the last item
+        self.strings = strings = strings + (None,)
+        self.refs = [self.resolveRef(entry) for entry in refTable] + [None]
+        self.tzinfos = [self.resolveTzinfo(entry) for entry in tzTable] + [None]
+        # shared between lines, as they are after parsing
+        self.paramSets = [tuple(tuple(strings[s] for s in param) for param in params) for params in paramSets]
+        self.lineSetters = tuple(slotSetter(base.ContentLine, name) for name in LINE_SLOTS)
+
+    @staticmethod
+    def resolveRef(entry):
+        registered, a, b = entry
+        return base.getBehavior(a, b) if registered else findClass(a, b)
+
+    @staticmethod
+    def resolveTzinfo(entry):
+        kind = entry[0]
+        if kind == TZ_UTC:
+            return icalendar.utc
+        if kind == TZ_STDLIB_UTC:
+            return datetime.timezone.utc
+        if kind == TZ_VTIMEZONE:
+            return tzinfoFromVtimezone(entry[1], entry[2])
+        return pickle.loads(entry[1])
+
+    def datetimeValue(self, value):
+        _, ordinal, seconds, microsecond, tz, fold = value
+        dt = datetime.datetime.combine(
+            datetime.date.fromordinal(ordinal),
+            datetime.time(seconds // 3600, seconds // 60 % 60, seconds % 60, microsecond, self.tzinfos[tz]),
+        )
+        return dt.replace(fold=1) if fold else dt
+
+    def dateValue(self, value):
+        return datetime.date.fromordinal(value[1])
+
+    def timedeltaValue(self, value):
+        return datetime.timedelta(*value[1:])
+
+    def timeValue(self, value):
+        _, hour, minute, second, microsecond, tz = value
+        return datetime.time(hour, minute, second, microsecond, self.tzinfos[tz])
+
+    def listValue(self, value):
+        return [self.value(item) for item in value[1:]]
+
+    def tupleValue(self, value):
+        return tuple(self.value(item) for item in value[1:])
+
+    def pickledValue(self, value):
+        return pickle.loads(value[1])
+
+    # decoders of encoded values, by tag
+    valueDecoders = {
+        LIST: listValue,
+        TUPLE: tupleValue,
+        DATETIME: datetimeValue,
+        DATE: dateValue,
+        TIME: timeValue,
+        TIMEDELTA: timedeltaValue,
+        PICKLED: pickledValue,
+    }
+
+    def value(self, value):
+        if type(value) is not tuple:
+            return value
+        return self.valueDecoders[value[0]](self, value)
+
+    def params(self, params):
+        """Return the params slot, raw params or a dict, and singletonparams of a line's encoded params."""
+        if type(params) is int:
+            return self.paramSets[params], None
+        if params is None:
+            return None, None
+        strings = self.strings
+        paramDict = {strings[key]: [strings[s] for s in values] for key, values in params[0]}
+        return paramDict, [strings[s] for s in params[1]]
+
+    def line(self, encoded):
+        strings, refs = self.strings, self.refs
+        name, group, behavior, parentBehavior, lineNumber, isNative, enc, value, params, pending, cls, text = encoded
+        params, singletonparams = self.params(params)
+        line = object.__new__(refs[cls])
+        slots = (
+            strings[name],
+            strings[group],
+            refs[behavior],
+            refs[parentBehavior],
+            lineNumber,
+            isNative,
+            enc,
+            value if type(value) is str else self.value(value),
+            params,
+            singletonparams,
+            pending if type(pending) is bool else refs[pending],
+            text,
+        )
+        for setSlot, slot in zip(self.lineSetters, slots):
+            setSlot(line, slot)
+        return line
+
+    def component(self, encoded):
+        strings, refs, setattr_ = self.strings, self.refs, object.__setattr__
+        cls, name, group, behavior, parentBehavior, useBegin, isNative, contents = encoded
+        component = object.__new__(refs[cls])
+        setattr_(component, "name", strings[name])
+        setattr_(component, "group", strings[group])
+        setattr_(component, "behavior", refs[behavior])
+        setattr_(component, "parentBehavior", refs[parentBehavior])
+        setattr_(component, "useBegin", useBegin)
+        setattr_(component, "_isNative", isNative)
+        line, node = self.line, self.node
+        setattr_(
+            component,
+            "contents",
+            {
+                strings[key]: [node(child) if child[0] else line(child[1]) for child in children]
+                for key, children in contents
+            },
+        )
+        return component
+
+    def node(self, encoded):
+        isComponent, body = encoded
+        return self.component(body) if isComponent else self.line(body)
+
+
+def dumps(components):
+    """Return a list of components as bytes."""
+    return Encoder(components).encode(components)
+
+
+def loads(data):
+    """
+    Return the list of components dumped to data.
+
+    Raise FormatError if data wasn't written by dumps, or by another version
+    of this module.  Like pickles, data must be trusted: it names the
+    classes to create, and may contain pickled values.
+    """
+    data = memoryview(data)
+    if len(data) <= len(MAGIC) or bytes(data[: len(MAGIC)]) != MAGIC or data[len(MAGIC)] != FORMAT_VERSION:
+        raise FormatError("Data isn't a binary vobject dump of this version")
+    tables, nodes = marshal.loads(data[len(MAGIC) + 1 :])
+    decoder = Decoder(*tables)
+    return [decoder.node(node) for node in nodes]
@@ -0,0 +1,536 @@
+"""Build components from logical lines, for readComponents and its variants."""
+
+import operator
+import re
+
+from .components import Component, ContentLine, Stack, childBehaviors, contentsKey, getBehavior, logger
+from .errors import ParseError, VObjectError
+from .lexer import splitLine
+
+# parameters whose lines don't keep their original text, see ComponentBuilder.makeLine
+ENCODING_PARAMS = frozenset(("ENCODING", "QUOTED-PRINTABLE", "BASE64"))
+
+
+class ParseLimits:
+    """
+    Hard limits on untrusted input, exceeding one raises a ParseError.
+
+    Every limit defaults to None, meaning unlimited.
+
+    @ivar maxLineLength:
+        The maximum length of a logical (unfolded) line, in characters.
+    @ivar maxParams:
+        The maximum number of parameters on one line.
+    @ivar maxDepth:
+        The maximum nesting depth of components.
+    @ivar maxComponents:
+        The maximum number of components in one stream, at any depth.
+    """
+
+    def __init__(self, maxLineLength=None, maxParams=None, maxDepth=None, maxComponents=None):
+        self.maxLineLength = maxLineLength
+        self.maxParams = maxParams
+        self.maxDepth = maxDepth
+        self.maxComponents = maxComponents
+
+    def fields(self):
+        """Return the limits as a tuple, in the order of __init__."""
+        return self.maxLineLength, self.maxParams, self.maxDepth, self.maxComponents
+
+    def __repr__(self):
+        return (
+            f"ParseLimits(maxLineLength={self.maxLineLength}, maxParams={self.maxParams}, "
+            f"maxDepth={self.maxDepth}, maxComponents={self.maxComponents})"
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, ParseLimits):
+            return NotImplemented
+        return self.fields() == other.fields()
+
+    def __hash__(self):
+        return hash(self.fields())
+
+
+NO_LIMITS = ParseLimits()
+
+
+def checkLimits(limits, depth, componentCount, lineNumber):
+    """
+    Raise ParseError if a new component breaks limits.
+    """
+    if limits.maxDepth is not None and depth > limits.maxDepth:
+        raise ParseError(f"Components are nested more than {limits.maxDepth} deep", lineNumber)
+    if limits.maxComponents is not None and componentCount > limits.maxComponents:
+        raise ParseError(f"Stream has more than {limits.maxComponents} components", lineNumber)
+
+
+def logSkippedLine(e):
+    """
+    Log the error of an unreadable line skipped with ignoreUnreadable.
+    """
+    if e.lineNumber is not None:
+        msg = "Skipped line {lineNumber}, message: {msg}"
+    else:
+        msg = "Skipped a line, message: {msg}"
+    logger.error(msg.format(**{"lineNumber": e.lineNumber, "msg": str(e)}))
+
+
+def _stackBehavior(stack, versionLine):
+    """
+    Return the behavior the top of stack will get once its root is complete.
+    """
+    root = stack.stack[0]
+    behavior = getBehavior(root.name, versionLine.value if versionLine is not None else None)
+    for component in stack.stack[1:]:
+        if behavior is None:
+            break
+        knownChild = childBehaviors(behavior).get(component.name)
+        behavior = knownChild[0] if knownChild is not None else None
+    return behavior
+
+
+def _isDependency(component, parentBehavior):
+    """
+    Return True if parentBehavior sorts component before its other children.
+    """
+    return component.name.lower() in parentBehavior.sortFirst
+
+
+# lines readComponents keeps whatever its properties argument says
+STRUCTURAL_NAMES = frozenset(("BEGIN", "END", "VERSION", "PROFILE"))
+
+# the name of a line, after its group and before its parameters or value
+line_name_re = re.compile(r"(?:[^.;:]*\.)?([^;:]*)")
+
+
+# properties whose values ComponentBuilder interns by default, they have few
+# distinct values which repeat across the components of a stream
+INTERN_VALUES = frozenset(("ACTION", "CALSCALE", "CLASS", "METHOD", "STATUS", "TRANSP", "TZID", "VERSION"))
+
+# the number of entries past which InternTable.trim empties a table
+INTERN_TABLE_SIZE = 4096
+
+
+class InternTable:
+    """
+    One copy of each name, group, parameter name and common value seen by
+    a parse, shared by the lines that use it.
+
+    @ivar internValues:
+        The upper case names of the properties whose values are interned.
+    @ivar names:
+        Maps names, groups and parameter names to their shared copy, and
+        names as parsed to their upper case copy.
+    @ivar params:
+        Maps raw params tuples to their copy with shared parameter names.
+    @ivar values:
+        Maps values of internValues properties to their shared copy.
+    """
+
+    def __init__(self, internValues=None):
+        self.internValues = INTERN_VALUES if internValues is None else {name.upper() for name in internValues}
+        self.names = {}
+        self.params = {}
+        self.values = {}
+
+    def name(self, name):
+        """Return the shared upper case copy of name."""
+        names = self.names
+        upper = names.get(name)
+        if upper is None:
+            upper = name.upper()
+            upper = names[name] = names.setdefault(upper, upper)
+        return upper
+
+    def group(self, group):
+        """Return the shared copy of group, which may be None."""
+        return group if group is None else self.names.setdefault(group, group)
+
+    def rawParams(self, params):
+        """Return a copy of a params tuple from splitLine with shared parameter names."""
+        shared = self.params.get(params)
+        if shared is None:
+            names = self.names
+            shared = self.params[params] = tuple(
+                (names.setdefault(param[0], param[0]),) + param[1:] for param in params
+            )
+        return shared
+
+    def value(self, name, value):
+        """Return the shared copy of value if name is among internValues, else value."""
+        if name in self.internValues:
+            return self.values.setdefault(value, value)
+        return value
+
+    def trim(self):
+        """
+        Empty the tables grown past INTERN_TABLE_SIZE.
+
+        Called as each yieldAt component is yielded, so that a long stream
+        doesn't keep a copy of every value it ever had.
+        """
+        for table in (self.names, self.params, self.values):
+            if len(table) > INTERN_TABLE_SIZE:
+                table.clear()
+
+
+def lineName(line):
+    """Return the upper case name of a logical line, without parsing it."""
+    return line_name_re.match(line).group(1).upper().replace("_", "-")
+
+
+where_re = re.compile(r"\s*([A-Za-z0-9-]+)\s*(<=|>=|!=|=|<|>|contains\b)\s*(.*?)\s*", re.IGNORECASE)
+
+WHERE_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "contains": operator.contains,
+}
+
+# properties whose values are lists of text, which contains compares one by one
+MULTI_VALUED_TEXT = frozenset(("CATEGORIES", "RESOURCES", "NICKNAME"))
+
+
+def splitTextValues(value):
+    """
+    Split the raw text of a multi-valued property on unescaped commas, and
+    unescape commas, semicolons and backslashes in each value.
+    """
+    values, current, escaped = [], [], False
+    for char in value:
+        if escaped:
+            current.append(char if char in ",;\\" else "\\" + char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == ",":
+            values.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    values.append("".join(current))
+    return values
+
+
+def containsTextValue(lineValue, value):
+    """Return whether the raw text of a multi-valued property has value among its values."""
+    if isinstance(lineValue, str):
+        lineValue = splitTextValues(lineValue)
+    return value in lineValue
+
+
+def compileWhere(where):
+    """
+    Return a predicate on Components for readComponents' where argument.
+
+    where is either a callable, returned as is, or an expression like
+    "DTSTART >= 20260101" or "CATEGORIES contains Work", see readComponents.
+    """
+    if callable(where):
+        return where
+    match = where_re.fullmatch(where)
+    if match is None:
+        raise VObjectError(f"Unable to parse where expression {where!r}")
+    name, op, value = match.groups()
+    op = op.lower()
+    if op == "contains" and name.upper() in MULTI_VALUED_TEXT:
+        compare = containsTextValue
+    else:
+        compare = WHERE_OPERATORS[op]
+    name = name.lower()
+    if len(value) > 1 and value[0] == value[-1] == '"':
+        value = value[1:-1]
+
+    def predicate(component):
+        lines = component.contents.get(name, ())
+        return any(compare(line.value, value) for line in lines if isinstance(line, ContentLine))
+
+    return predicate
+
+
+class ReadOptions:
+    """
+    The options of readComponents beyond validate, transform,
+    ignoreUnreadable and allowQP, given to it as keyword arguments, see
+    readComponents for their meaning.
+
+    @ivar yieldAt:
+        The upper case names of the components yielded as soon as they end,
+        or None.
+    @ivar limits:
+        A ParseLimits instance, NO_LIMITS if none was given.
+    @ivar lazyNative:
+        Whether lines are transformed to native when first used.
+    @ivar properties:
+        Maps upper case component names to the upper case names of the lines
+        they keep, STRUCTURAL_NAMES included, or None.
+    @ivar where:
+        A predicate on Components, or None.
+    @ivar internValues:
+        The names of the properties whose values are interned, or None for
+        INTERN_VALUES.
+    @ivar keepText:
+        Whether lines keep their original text.
+    """
+
+    def __init__(
+        self,
+        *,
+        yieldAt=None,
+        limits=None,
+        lazyNative=False,
+        properties=None,
+        where=None,
+        internValues=None,
+        keepText=False,
+    ):
+        self.yieldAt = {name.upper() for name in yieldAt} if yieldAt is not None else None
+        self.limits = limits if limits is not None else NO_LIMITS
+        self.lazyNative = lazyNative
+        if properties is not None:
+            properties = {
+                name.upper(): STRUCTURAL_NAMES.union(prop.upper() for prop in props)
+                for name, props in properties.items()
+            }
+        self.properties = properties
+        self.where = compileWhere(where) if where is not None else None
+        self.internValues = internValues
+        self.keepText = keepText
+
+
+class ComponentBuilder:
+    """
+    Build Components from logical lines as they're pushed.
+
+    This is the state machine behind readComponents, see it for the meaning
+    of the arguments, options is a ReadOptions instance.
+    """
+
+    def __init__(self, validate=False, transform=True, ignoreUnreadable=False, options=None):
+        self.validate = validate
+        self.transform = transform
+        self.ignoreUnreadable = ignoreUnreadable
+        self.options = options if options is not None else ReadOptions()
+        self.interned = InternTable(self.options.internValues)
+        self.stack = Stack()
+        self.versionLine = None
+        # whether behaviors are being assigned as lines are added, see attach
+        self.assigning = False
+        self.componentCount = 0
+
+    def push(self, line, n):
+        """
+        Push the next logical line, numbered n.
+
+        Return the Component line completes, or None.
+        """
+        stack, options = self.stack, self.options
+        if options.properties is not None:
+            keep = options.properties.get(stack.topName())
+            if keep is not None and lineName(line) not in keep:
+                return None
+        if self.ignoreUnreadable:
+            try:
+                vline = self.makeLine(line, n)
+            except VObjectError as e:
+                logSkippedLine(e)
+                return None
+        else:
+            vline = self.makeLine(line, n)
+        if vline.name == "VERSION":
+            self.versionLine = vline
+            if len(stack) == 1 and stack.top().useBegin and options.where is None:
+                self.startAssigning(stack.top())
+            self.attach(vline)
+        elif vline.name == "BEGIN":
+            self.begin(vline)
+        elif vline.name == "PROFILE":
+            if not stack.top():
+                self.componentCount += 1
+                checkLimits(options.limits, 1, self.componentCount, n)
+                stack.push(Component())
+            stack.top().setProfile(vline.value)
+        elif vline.name == "END":
+            return self.end(vline)
+        else:
+            self.attach(vline)  # not a START or END line
+        return None
+
+    def begin(self, vline):
+        """Start the component named by a BEGIN line."""
+        stack = self.stack
+        self.componentCount += 1
+        checkLimits(self.options.limits, len(stack) + 1, self.componentCount, vline.lineNumber)
+        component = Component(vline.value, group=vline.group)
+        if len(stack) == 0:
+            self.assigning = False
+        elif self.assigning:
+            parentBehavior = stack.top().behavior
+            if parentBehavior is not None:
+                component.parentBehavior = parentBehavior
+                knownChild = childBehaviors(parentBehavior).get(component.name)
+                if knownChild is not None:
+                    component.behavior = knownChild[0]
+        stack.push(component)
+
+    def end(self, vline):
+        """
+        End the component an END line closes.
+
+        Return the component if it's to be yielded, or None.
+        """
+        stack = self.stack
+        if len(stack) == 0:
+            raise ParseError(f"Attempted to end the {vline.value} component but it was never opened", vline.lineNumber)
+        if vline.value.upper() != stack.topName():
+            raise ParseError(f"{stack.topName()} component wasn't closed", vline.lineNumber)
+        component = stack.pop()
+        if len(stack) == 0:
+            return self.endRoot(component)
+        if self.options.yieldAt is not None:
+            return self.endChild(component)
+        self.attach(component)
+        return None
+
+    def endRoot(self, component):
+        """Finish a top level component, return it unless where rejects it."""
+        options = self.options
+        if options.where is not None and options.yieldAt is None and not options.where(component):
+            return None
+        behavior = self.rootBehavior(component)
+        if behavior is not None and not (self.assigning and behavior is component.behavior):
+            component.setBehavior(behavior)
+        if self.validate:
+            component.validate(raiseException=True)
+        if self.transform:
+            component.transformChildrenToNative(options.lazyNative)
+        return component
+
+    def endChild(self, component):
+        """
+        Finish a sub-component while yielding yieldAt components.
+
+        Return it if it's to be yielded rather than kept in its parent, or
+        None.
+        """
+        options, stack = self.options, self.stack
+        if self.assigning:
+            parentBehavior = stack.top().behavior
+        else:
+            parentBehavior = _stackBehavior(stack, self.versionLine)
+        if component.name in options.yieldAt:
+            if options.where is not None and not options.where(component):
+                return None
+            if not self.assigning:
+                component.parentBehavior = parentBehavior
+                component.autoBehavior(True)
+            if self.validate:
+                component.validate(raiseException=True)
+            if self.transform:
+                component = component.transformToNative()
+                component.transformChildrenToNative(options.lazyNative)
+            self.interned.trim()
+            return component
+        if self.transform and parentBehavior is not None and _isDependency(component, parentBehavior):
+            # siblings yielded later may depend on it, like a vtimezone
+            if not self.assigning:
+                component.parentBehavior = parentBehavior
+                component.autoBehavior(True)
+            component = component.transformToNative()
+        self.attach(component)
+        return None
+
+    def rootBehavior(self, root):
+        """Return the behavior root gets when it ends, given the last VERSION line."""
+        if root.name is None:
+            return None
+        return getBehavior(root.name, self.versionLine.value if self.versionLine is not None else None)
+
+    def startAssigning(self, root):
+        """
+        Give root its behavior and assign behaviors to what it has so far,
+        then to each line and component as it's added.
+
+        Called at root's VERSION line, so the root's children needn't all be
+        cascaded over once it ends.
+        """
+        behavior = self.rootBehavior(root)
+        if behavior is not None and behavior is not root.behavior:
+            root.setBehavior(behavior)
+        self.assigning = True
+
+    def attach(self, obj):
+        """
+        Add obj to the top of the stack, like Stack.modifyTop.
+
+        While assigning, a line gets its behavior here, from its parent's.
+        Components got theirs when they began, and their children as they
+        were added, so unlike Component.add nothing is cascaded over again.
+        """
+        stack = self.stack
+        parent = stack.top()
+        if parent is None:
+            parent = Component()
+            stack.push(parent)
+        if self.assigning:
+            behavior = parent.behavior
+            if behavior is not None and isinstance(obj, ContentLine):
+                setattr_ = object.__setattr__
+                setattr_(obj, "parentBehavior", behavior)
+                knownChild = childBehaviors(behavior).get(obj.name)
+                if knownChild is None:
+                    setattr_(obj, "behavior", behavior.defaultBehavior)
+                    obj.deferDecode()
+                elif knownChild[0] is not None:
+                    setattr_(obj, "behavior", knownChild[0])
+                    obj.deferDecode()
+        elif parent.behavior:
+            obj.parentBehavior = parent.behavior
+            obj.autoBehavior(True)
+        parent.contents.setdefault(contentsKey(obj.name), []).append(obj)
+
+    def makeLine(self, line, n):
+        """
+        Return the ContentLine for logical line n, like textLineToContentLine,
+        with its name, group, parameter names and, for internValues
+        properties, value interned, and with keepText, line kept as its
+        original text.
+        """
+        name, params, value, group = splitLine(line, n, self.options.limits.maxParams)
+        interned = self.interned
+        upper = interned.name(name)
+        group = interned.group(group)
+        if params:
+            params = interned.rawParams(params)
+        value = interned.value(upper, value)
+        vline = ContentLine(upper, params, value, group, encoded=True, lineNumber=n)
+        # encoded lines are written back decoded once read, and quoted-printable
+        # soft line breaks were joined with a bare LF, so neither keeps its text
+        if (
+            self.options.keepText
+            and "\n" not in line
+            and not any(param[0].upper() in ENCODING_PARAMS for param in params)
+        ):
+            object.__setattr__(vline, "_text", line)
+        return vline
+
+    def finish(self, lineNumber=None):
+        """
+        Return the last Component, if it was never ended, or None.
+
+        lineNumber is the number of the last line pushed, reported if the
+        component should have been ended.
+        """
+        stack = self.stack
+        if stack.top():
+            if stack.topName() is None:
+                logger.warning("Top level component was never named")
+            elif stack.top().useBegin:
+                raise ParseError(f"Component {stack.topName()} was never closed", lineNumber)
+            return stack.pop()
+        return None
@@ -0,0 +1,117 @@
+"""Cache parsed components, for services that parse the same bodies repeatedly."""
+
+import collections
+import hashlib
+import os
+import threading
+
+from . import base
+
+
+def inputBytes(streamOrString):
+    """
+    Return (data, encoded) for readComponents' first argument.
+
+    data is what's parsed, encoded is the bytes it's keyed by.  Streams and
+    paths are read in full.
+    """
+    if isinstance(streamOrString, os.PathLike):
+        with open(streamOrString, "rb") as f:
+            data = f.read()
+    elif isinstance(streamOrString, (str, bytes, bytearray)):
+        data = streamOrString
+    else:
+        data = streamOrString.read()
+    return data, (data.encode("utf-8") if isinstance(data, str) else bytes(data))
+
+
+class ParseCache:
+    """
+    A least recently used cache of parsed components, keyed by a digest of
+    the input and the parse options.
+
+    Each lookup returns forks of the cached components, see Component.fork,
+    so callers may change them without affecting the cache or each other.
+    The cache is safe to share between threads, though two threads missing
+    on the same input may both parse it.
+
+    @ivar maxEntries:
+        The maximum number of inputs cached.
+    @ivar maxBytes:
+        The maximum total size of the inputs cached, in bytes, standing in
+        for the size of their components.  Larger inputs aren't cached.
+    @ivar hits:
+        The number of lookups answered from the cache.
+    @ivar misses:
+        The number of lookups which had to parse.
+    @ivar size:
+        The total size of the inputs cached.
+    """
+
+    def __init__(self, maxEntries=128, maxBytes=64 * 1024 * 1024):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def readComponents(self, streamOrString, **options):
+        """
+        Return a list of the components base.readComponents would generate,
+        with the same keyword arguments.
+
+        A callable where argument is part of the key by identity, limits are
+        part of it by value.
+        """
+        data, encoded = inputBytes(streamOrString)
+        key = (hashlib.blake2b(encoded).digest(), repr(sorted(options.items())))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is None:
+            components = list(base.readComponents(data, **options))
+            if not self.store(key, components, len(encoded)):
+                return components
+        else:
+            components = entry[0]
+        return [component.fork() for component in components]
+
+    def readOne(self, streamOrString, **options):
+        """Return the first component, as base.readOne would."""
+        components = self.readComponents(streamOrString, **options)
+        if not components:
+            raise StopIteration
+        return components[0]
+
+    def store(self, key, components, size):
+        """
+        Cache components, evicting the least recently used entries.
+
+        Return False if components are too large to cache, or were cached by
+        another thread meanwhile.
+        """
+        if size > self.maxBytes:
+            return False
+        with self.lock:
+            if key in self.entries:
+                return False
+            self.entries[key] = (components, size)
+            self.size += size
+            while len(self.entries) > self.maxEntries or self.size > self.maxBytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+        return True
@@ -0,0 +1,1154 @@
+"""
+The objects vobjects are made of, content lines and components, and the
+registry of their behaviors.
+"""
+
+import codecs
+import copy
+import datetime
+import logging
+import sys
+
+from .errors import NativeError, ParseError, VObjectError
+from .lexer import HEAD_CACHE_SIZE
+from .output import OutputBuffer, encodedLine, foldSegments
+
+# Removed python 2 compatibility code : flake8 fixes
+basestring = (str, bytes)
+unicode_type = str
+
+
+def str_(s):
+    return s
+
+
+def to_unicode(value):
+    """Converts a string argument to a unicode string.
+
+    If the argument is already a unicode string, it is returned unchanged.
+    Otherwise it must be a byte string and is decoded as utf8.
+    """
+    return value if isinstance(value, unicode_type) else value.decode("utf-8")
+
+
+def to_basestring(s):
+    """Converts a string argument to a byte string.
+
+    If the argument is already a byte string, it is returned unchanged.
+    Otherwise it must be a unicode string and is encoded as utf8.
+    """
+    return s if isinstance(s, bytes) else s.encode("utf-8")
+
+
+# ------------------------------------ Logging ---------------------------------
+# named after vobject.base, which defined it before this module existed
+logger = logging.getLogger("vobject.base")
+if not logging.getLogger().handlers:
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter("%(name)s %(levelname)s %(message)s")
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+logger.setLevel(logging.ERROR)  # Log errors
+DEBUG = False  # Don't waste time on debug calls
+
+
+# --------------------------------- Main classes -------------------------------
+
+
+class VBase:
+    """
+    Base class for ContentLine and Component.
+
+    @ivar behavior:
+        The Behavior class associated with this object, which controls
+        validation, transformations, and encoding.
+    @ivar parentBehavior:
+        The object's parent's behavior, or None if no behaviored parent exists.
+    @ivar isNative:
+        Boolean describing whether this component is a Native instance.
+    @ivar group:
+        An optional group prefix, should be used only to indicate sort order in
+        vCards, according to spec.
+
+    Current spec: 4.0 (http://tools.ietf.org/html/rfc6350)
+
+    VBase and its subclasses use __slots__ to keep large documents compact,
+    subclasses which are swapped in by transformToNative must not add slots.
+    """
+
+    __slots__ = ("name", "group", "behavior", "parentBehavior", "_isNative")
+
+    def __init__(self, group=None, *args, **kwds):
+        super().__init__(*args, **kwds)
+        self.name = None
+        self.group = group
+        self.behavior = None
+        self.parentBehavior = None
+        self.isNative = False
+
+    def __getstate__(self):
+        """Return the values of all slots, for pickle and copy."""
+        return [getattr(self, name) for name in slotNames(type(self))]
+
+    def __setstate__(self, state):
+        for name, value in zip(slotNames(type(self)), state):
+            object.__setattr__(self, name, value)
+
+    def copy(self, copyit):
+        self.group = copyit.group
+        self.behavior = copyit.behavior
+        self.parentBehavior = copyit.parentBehavior
+        self.isNative = copyit.isNative
+
+    @property
+    def isNative(self):
+        return self._isNative
+
+    @isNative.setter
+    def isNative(self, value):
+        self._isNative = value
+
+    def validate(self, *args, **kwds):
+        """Call the behavior's validate method, or return True."""
+        return self.behavior.validate(self, *args, **kwds) if self.behavior else True
+
+    def getChildren(self):
+        """Return an iterable containing the contents of the object."""
+        return []
+
+    def clearBehavior(self, cascade=True):
+        """Set behavior to None. Do for all descendants if cascading."""
+        self.behavior = None
+        if cascade:
+            self.transformChildrenFromNative()
+
+    def autoBehavior(self, cascade=False):
+        """
+        Set behavior if name is in self.parentBehavior.knownChildren.
+
+        If cascade is True, unset behavior and parentBehavior for all
+        descendants, then recalculate behavior and parentBehavior.
+        """
+        parentBehavior = self.parentBehavior
+        if parentBehavior is not None:
+            knownChild = childBehaviors(parentBehavior).get(self.name)
+            if knownChild is not None:
+                behavior = knownChild[0]
+                if behavior is not None:
+                    self.setBehavior(behavior, cascade)
+                    if isinstance(self, ContentLine):
+                        self.deferDecode()
+            elif isinstance(self, ContentLine):
+                self.behavior = parentBehavior.defaultBehavior
+                self.deferDecode()
+
+    def setBehavior(self, behavior, cascade=True):
+        """Set behavior. If cascade is True, autoBehavior all descendants."""
+        self.behavior = behavior
+        if cascade:
+            for obj in self.getChildren():
+                obj.parentBehavior = behavior
+                obj.autoBehavior(True)
+
+    def transformToNative(self):
+        """
+        Transform this object into a custom VBase subclass.
+
+        transformToNative should always return a representation of this object.
+        It may do so by modifying self in place then returning self, or by
+        creating a new object.
+        """
+        if not self.behavior or not self.behavior.hasNative or self.isNative:
+            return self
+        else:
+            self_orig = copy.copy(self)
+            try:
+                return self.behavior.transformToNative(self)
+            except Exception as e:
+                # wrap errors in transformation in a ParseError
+                lineNumber = getattr(self, "lineNumber", None)
+
+                if isinstance(e, ParseError):
+                    if lineNumber is not None:
+                        e.lineNumber = lineNumber
+                    raise
+
+                msg = (
+                    f"In transformToNative, unhandled exception on line {lineNumber}: {sys.exc_info()[0]}:"
+                    f" {sys.exc_info()[1]} ({self_orig})"
+                )
+                raise ParseError(msg, lineNumber)
+
+    def transformFromNative(self):
+        """
+        Return self transformed into a ContentLine or Component if needed.
+
+        May have side effects.  If it does, transformFromNative and
+        transformToNative MUST have perfectly inverse side effects. Allowing
+        such side effects is convenient for objects whose transformations only
+        change a few attributes.
+
+        Note that it isn't always possible for transformFromNative to be a
+        perfect inverse of transformToNative, in such cases transformFromNative
+        should return a new object, not self after modifications.
+        """
+        if self.isNative and self.behavior and self.behavior.hasNative:
+            try:
+                return self.behavior.transformFromNative(self)
+            except Exception as e:
+                # wrap errors in transformation in a NativeError
+                lineNumber = getattr(self, "lineNumber", None)
+                if isinstance(e, NativeError):
+                    if lineNumber is not None:
+                        e.lineNumber = lineNumber
+                    raise
+
+                msg = (
+                    f"In transformFromNative, unhandled exception on line {lineNumber} {sys.exc_info()[0]}:"
+                    f" {sys.exc_info()[1]}"
+                )
+                raise NativeError(msg, lineNumber)
+        else:
+            return self
+
+    def transformChildrenToNative(self, lazy=False):
+        """Recursively replace children with their native representation."""
+
+    def transformChildrenFromNative(self, clearBehavior=True):
+        """Recursively transform native children to vanilla representations."""
+
+    def serialize(self, buf=None, lineLength=75, validate=True, behavior=None, *args, **kwargs):
+        """
+        Serialize to buf if it exists, otherwise return a string.
+
+        Use self.behavior.serialize if behavior exists.  Output is collected
+        in one OutputBuffer for the whole call, which writes to buf, as text
+        or bytes depending on buf, in large blocks.
+        """
+        if not behavior:
+            behavior = self.behavior
+
+        outbuf = buf if isinstance(buf, OutputBuffer) else OutputBuffer(buf)
+        if behavior:
+            if DEBUG:
+                logger.debug("serializing %s with behavior %s", self.name, self.behavior)
+            behavior.serialize(self, outbuf, lineLength, validate, *args, **kwargs)
+        else:
+            if DEBUG:
+                logger.debug("serializing %s without behavior", self.name)
+            defaultSerialize(self, outbuf, lineLength)
+        if outbuf is buf:
+            return buf
+        if buf is None:
+            return outbuf.getvalue()
+        outbuf.flush()
+        return buf
+
+
+# values forkValue shares rather than copies
+IMMUTABLE_TYPES = (str, bytes, int, float, type(None), datetime.date, datetime.time, datetime.timedelta)
+
+
+def forkValue(value):
+    """
+    Return a copy of a ContentLine value, sharing what's immutable.
+
+    Lists and tuples are copied with their items forked, datetimes and other
+    IMMUTABLE_TYPES are shared, anything else is deep copied.
+    """
+    if isinstance(value, IMMUTABLE_TYPES):
+        return value
+    if type(value) is list:
+        return [forkValue(item) for item in value]
+    if type(value) is tuple:
+        return tuple(forkValue(item) for item in value)
+    return copy.deepcopy(value)
+
+
+slotNamesCache = {}
+
+
+def slotNames(cls):
+    """Return the names of the slots of cls and its base classes."""
+    names = slotNamesCache.get(cls)
+    if names is None:
+        names = slotNamesCache[cls] = tuple(
+            name for c in reversed(cls.__mro__) for name in c.__dict__.get("__slots__", ())
+        )
+    return names
+
+
+def toVName(name, stripNum=0, upper=False):
+    """
+    Turn a Python name into an iCalendar style name, optionally uppercase and with characters stripped off.
+    """
+    if upper:
+        name = name.upper()
+    if stripNum != 0:
+        name = name[:-stripNum]
+    return name.replace("_", "-")
+
+
+class ContentLine(VBase):  # pylint: disable=too-many-instance-attributes
+    """
+    Holds one content line for formats like vCard and vCalendar.
+
+    For example::
+      <SUMMARY{u'param1' : [u'val1'], u'param2' : [u'val2']}Bastille Day Party>
+
+    @ivar name:
+        The uppercased name of the contentline.
+    @ivar params:
+        A dictionary of parameters and associated lists of values (the list may
+        be empty for empty parameters).
+    @ivar value:
+        The value of the contentline.
+    @ivar singletonparams:
+        A list of parameters for which it's unclear if the string represents the
+        parameter name or the parameter value. In vCard 2.1, "The value string
+        can be specified alone in those cases where the value is unambiguous".
+        This is crazy, but we have to deal with it.
+    @ivar encoded:
+        A boolean describing whether the data in the content line is encoded.
+        Generally, text read from a serialized vCard or vCalendar should be
+        considered encoded.  Data added programmatically should not be encoded.
+        Decoding by the behavior is deferred until value, params or encoded is
+        first used, so lines that are never read are never decoded.
+    @ivar lineNumber:
+        An optional line number associated with the contentline.
+
+    Parsed lines share their raw params between lines with the same name and
+    parameters, the params dict and singletonparams list are only created
+    when they're used.  Until then the raw params tuple is held where the
+    params dict will be.
+
+    Parsed lines also keep their original unfolded text, which serialize
+    writes instead of re-encoding the line until the line is changed, see
+    originalText.
+    """
+
+    __slots__ = ("lineNumber", "_encoded", "_value", "_params", "_singletonparams", "_pending", "_text")
+
+    # slots fork shares between a line and its copy
+    forkShared = (
+        "name",
+        "group",
+        "behavior",
+        "parentBehavior",
+        "lineNumber",
+        "_isNative",
+        "_encoded",
+        "_pending",
+        "_text",
+    )
+
+    def __init__(self, name, params, value, group=None, encoded=False, isNative=False, lineNumber=None, *args, **kwds):
+        """
+        Take output from parseLine or splitLine.
+
+        Group is used as a positional argument to match parseLine's return.
+        The params list isn't converted to a dictionary until params, value or
+        singletonparams is first used.
+        """
+        super().__init__(group, *args, **kwds)
+
+        # keep names interned by the parser
+        self.name = name if name.isupper() else name.upper()
+        self.isNative = isNative
+        self.lineNumber = lineNumber
+        self._encoded = encoded
+        self._value = value
+        # raw params, a tuple, until they're unpacked into a dict
+        self._params = None
+        self._singletonparams = None
+        if params:
+            self._params = params if type(params) is tuple else tuple(map(tuple, params))
+        # False if no work is left to do, the behavior whose decode hasn't been
+        # run on value yet, or True for unpacking params or a transformation
+        # to native, marked by isNative being None, still to be done
+        self._pending = self._params is not None
+        # the line as parsed, None once it's changed
+        self._text = None
+
+    def _unpackParams(self):
+        """
+        Convert the raw params to a dictionary, undoing quoted-printable
+        encoding.
+
+        Return True if the value was quoted-printable.
+        """
+        rawParams = self._params
+        params = self._params = {}
+        singletonparams = self._singletonparams = []
+        for param in rawParams:
+            if len(param) == 1:
+                singletonparams.append(param[0])
+            else:
+                key = param[0]
+                params.setdefault(key if key.isupper() else key.upper(), []).extend(param[1:])
+
+        qp = False
+        if "ENCODING" in params and "QUOTED-PRINTABLE" in params["ENCODING"]:
+            qp = True
+            params["ENCODING"].remove("QUOTED-PRINTABLE")
+            if len(params["ENCODING"]) == 0:
+                del params["ENCODING"]
+        if "QUOTED-PRINTABLE" in singletonparams:
+            qp = True
+            singletonparams.remove("QUOTED-PRINTABLE")
+        if qp:
+            if "ENCODING" in params:
+                self._value = codecs.decode(self._value.encode("utf-8"), "quoted-printable").decode(params["ENCODING"])
+            else:
+                if "CHARSET" in params:
+                    self._value = codecs.decode(self._value.encode("utf-8"), "quoted-printable").decode(
+                        params["CHARSET"][0]
+                    )
+                else:
+                    self._value = codecs.decode(self._value.encode("utf-8"), "quoted-printable").decode("utf-8")
+        return qp
+
+    def _resolve(self):
+        """Unpack params, then run any deferred decode and native transformation."""
+        pending, self._pending = self._pending, False
+        # decoding changes how the line is held, not what it says
+        text = self._text
+        if type(self._params) is tuple and self._unpackParams():
+            # soft line breaks were joined, so the text is no longer the line
+            text = None
+        if pending is not True:
+            pending.decode(self)
+        if self._isNative is None:
+            self.isNative = False
+            self.transformToNative()
+        self._text = text
+
+    def transformToNative(self):
+        text = self._text
+        obj = super().transformToNative()
+        self._text = text
+        return obj
+
+    def transformFromNative(self):
+        text = self._text
+        obj = super().transformFromNative()
+        self._text = text
+        return obj
+
+    def originalText(self):
+        """
+        Return the line as it was parsed, unfolded, or None if it wasn't
+        parsed with keepText or may have changed since.
+
+        Setting value, params, singletonparams, encoded, name or group, or
+        getting params or singletonparams, which could then be changed in
+        place, counts as a change.  So does having a value which isn't one of
+        IMMUTABLE_TYPES, like a list.  Decoding and transformation don't.
+        """
+        text = self._text
+        if text is not None and isinstance(self._value, IMMUTABLE_TYPES):
+            return text
+        return None
+
+    def deferDecode(self):
+        """
+        Decode value with the current behavior when the line is first used.
+
+        Decoding is skipped if the line isn't encoded, or if another behavior's
+        decode is already pending.
+        """
+        if self._encoded and type(self._pending) is bool and self.behavior is not None:
+            self._pending = self.behavior
+
+    def deferNative(self):
+        """
+        Transform to native when the line is first used.
+
+        Used instead of transformToNative by transformChildrenToNative when
+        lazy is True.
+        """
+        if not self._isNative and self.behavior is not None and self.behavior.hasNative:
+            self.isNative = None
+            if not self._pending:
+                self._pending = True
+
+    @property
+    def value(self):
+        if self._pending:
+            self._resolve()
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if self._pending:
+            self._resolve()
+        self._value = value
+        self._text = None
+
+    @property
+    def encoded(self):
+        if self._pending:
+            self._resolve()
+        return self._encoded
+
+    @encoded.setter
+    def encoded(self, value):
+        if self._pending:
+            self._resolve()
+        self._encoded = value
+        self._text = None
+
+    def _getIsNative(self):
+        if self._pending:
+            self._resolve()
+        return self._isNative
+
+    # VBase's setter, which doesn't resolve pending work
+    isNative = property(_getIsNative, VBase.isNative.fset)
+
+    @property
+    def params(self):
+        if self._pending:
+            self._resolve()
+        if self._params is None:
+            self._params = {}
+        # the dict may be changed in place
+        self._text = None
+        return self._params
+
+    @params.setter
+    def params(self, value):
+        if self._pending:
+            self._resolve()
+        self._params = value
+        self._text = None
+
+    @property
+    def singletonparams(self):
+        if self._pending:
+            self._resolve()
+        if self._singletonparams is None:
+            self._singletonparams = []
+        self._text = None
+        return self._singletonparams
+
+    @singletonparams.setter
+    def singletonparams(self, value):
+        if self._pending:
+            self._resolve()
+        self._singletonparams = value
+        self._text = None
+
+    @classmethod
+    def duplicate(cls, copyit):
+        newcopy = cls("", {}, "")
+        newcopy.copy(copyit)
+        return newcopy
+
+    def copy(self, copyit):
+        super().copy(copyit)
+        self.name = copyit.name
+        self.value = copy.copy(copyit.value)
+        self.encoded = self.encoded
+        self.params = copy.copy(copyit.params)
+        for k, v in self.params.items():
+            self.params[k] = copy.copy(v)
+        self.singletonparams = copy.copy(copyit.singletonparams)
+        self.lineNumber = copyit.lineNumber
+
+    def fork(self):
+        """
+        Return a copy of self which can be changed independently.
+
+        Unlike duplicate, decoding and transformation still pending are
+        copied rather than done, and raw params and immutable values are
+        shared, see forkValue.
+        """
+        new = object.__new__(type(self))
+        setattr_ = object.__setattr__  # skip the _param handling of __setattr__
+        for name in self.forkShared:
+            setattr_(new, name, getattr(self, name))
+        setattr_(new, "_value", forkValue(self._value))
+        params, singletonparams = self._params, self._singletonparams
+        if params is not None and type(params) is not tuple:
+            params = {k: list(v) for k, v in params.items()}
+        setattr_(new, "_params", params)
+        setattr_(new, "_singletonparams", None if singletonparams is None else list(singletonparams))
+        return new
+
+    def __eq__(self, other):
+        try:
+            return (self.name == other.name) and (self.params == other.params) and (self.value == other.value)
+        except AttributeError:
+            return False
+
+    def __getattr__(self, name):
+        """
+        Make params accessible via self.foo_param or self.foo_paramlist.
+
+        Underscores, legal in python variable names, are converted to dashes,
+        which are legal in IANA tokens.
+        """
+        try:
+            if name.endswith("_param"):
+                if self._pending:
+                    self._resolve()
+                # don't create a params dict just to look something up
+                return (self._params or {})[toVName(name, 6, True)][0]
+            elif name.endswith("_paramlist"):
+                return self.params[toVName(name, 10, True)]
+            else:
+                raise AttributeError(name)
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        """
+        Make params accessible via self.foo_param or self.foo_paramlist.
+
+        Underscores, legal in python variable names, are converted to dashes,
+        which are legal in IANA tokens.
+        """
+        if name.endswith("_param"):
+            self.params[toVName(name, 6, True)] = value if type(value) is list else [value]
+        elif name.endswith("_paramlist"):
+            if type(value) is list:
+                self.params[toVName(name, 10, True)] = value
+            else:
+                raise VObjectError("Parameter list set to a non-list")
+        else:
+            # object.__setattr__ also calls property setters
+            object.__setattr__(self, name, value)
+            if name in ("name", "group"):
+                object.__setattr__(self, "_text", None)
+
+    def __delattr__(self, name):
+        try:
+            if name.endswith("_param"):
+                del self.params[toVName(name, 6, True)]
+            elif name.endswith("_paramlist"):
+                del self.params[toVName(name, 10, True)]
+            else:
+                object.__delattr__(self, name)
+        except KeyError:
+            raise AttributeError(name)
+
+    def valueRepr(self):
+        """
+        Transform the representation of the value
+        according to the behavior, if any.
+        """
+        v = self.value
+        if self.behavior:
+            v = self.behavior.valueRepr(self)
+        return v
+
+    def __str__(self):
+        try:
+            return f"<{self.name}{self.params}{self.valueRepr()}>"
+        except UnicodeEncodeError:
+            return f"<{self.name}{self.params}{self.valueRepr().encode('utf-8')}>"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __unicode__(self):
+        return f"<{self.name}{self.params}{self.valueRepr()}>"
+
+    def prettyPrint(self, level=0, tabwidth=3):
+        pre = " " * level * tabwidth
+        print(pre, self.name + ":", self.valueRepr())
+        if self.params:
+            print(pre, "params for ", self.name + ":")
+            for k in self.params.keys():
+                print(pre + " " * tabwidth, k, self.params[k])
+
+
+class Component(VBase):
+    """
+    A complex property that can contain multiple ContentLines.
+
+    For our purposes, a component must start with a BEGIN:xxxx line and end with
+    END:xxxx, or have a PROFILE:xxx line if a top-level component.
+
+    @ivar contents:
+        A dictionary of lists of Component or ContentLine instances. The keys
+        are the lowercased names of child ContentLines or Components.
+        Note that BEGIN and END ContentLines are not included in contents.
+    @ivar name:
+        Uppercase string used to represent this Component, i.e VCARD if the
+        serialized object starts with BEGIN:VCARD.
+    @ivar useBegin:
+        A boolean flag determining whether BEGIN: and END: lines should
+        be serialized.
+    """
+
+    __slots__ = ("contents", "useBegin")
+
+    def __init__(self, name=None, *args, **kwds):
+        super().__init__(*args, **kwds)
+        self.contents = {}
+        if name:
+            self.name = name.upper()
+            self.useBegin = True
+        else:
+            self.name = ""
+            self.useBegin = False
+
+        self.autoBehavior()
+
+    @classmethod
+    def duplicate(cls, copyit):
+        newcopy = cls()
+        newcopy.copy(copyit)
+        return newcopy
+
+    def copy(self, copyit):
+        super().copy(copyit)
+
+        # deep copy of contents
+        self.contents = {}
+        for key, lvalue in copyit.contents.items():
+            newvalue = []
+            for value in lvalue:
+                newitem = value.duplicate(value)
+                newvalue.append(newitem)
+            self.contents[key] = newvalue
+
+        self.name = copyit.name
+        self.useBegin = copyit.useBegin
+
+    def fork(self):
+        """
+        Return a copy of self and its children which can be changed
+        independently, see ContentLine.fork.
+        """
+        new = object.__new__(type(self))
+        setattr_ = object.__setattr__
+        for name in ("name", "group", "behavior", "parentBehavior", "useBegin", "_isNative"):
+            setattr_(new, name, getattr(self, name))
+        contents = {key: [child.fork() for child in children] for key, children in self.contents.items()}
+        setattr_(new, "contents", contents)
+        return new
+
+    def setProfile(self, name):
+        """
+        Assign a PROFILE to this unnamed component.
+
+        Used by vCard, not by vCalendar.
+        """
+        if self.name or self.useBegin:
+            if self.name == name:
+                return
+            raise VObjectError("This component already has a PROFILE or uses BEGIN.")
+        self.name = name.upper()
+
+    def __getattr__(self, name):
+        """
+        For convenience, make self.contents directly accessible.
+
+        Underscores, legal in python variable names, are converted to dashes,
+        which are legal in IANA tokens.
+        """
+        # if the object is being re-created by pickle, self.contents may not
+        # be set, don't get into an infinite loop over the issue
+        if name == "contents":
+            return object.__getattribute__(self, name)
+        try:
+            if name.endswith("_list"):
+                return self.contents[toVName(name, 5)]
+            else:
+                return self.contents[toVName(name)][0]
+        except KeyError:
+            raise AttributeError(name)
+
+    normal_attributes = ["contents", "name", "behavior", "parentBehavior", "group"]
+
+    def __setattr__(self, name, value):
+        """
+        For convenience, make self.contents directly accessible.
+
+        Underscores, legal in python variable names, are converted to dashes,
+        which are legal in IANA tokens.
+        """
+        if name not in self.normal_attributes and name.lower() == name:
+            if type(value) is list:
+                if name.endswith("_list"):
+                    name = name[:-5]
+                self.contents[toVName(name)] = value
+            elif name.endswith("_list"):
+                raise VObjectError("Component list set to a non-list")
+            else:
+                self.contents[toVName(name)] = [value]
+        else:
+            prop = getattr(self.__class__, name, None)
+            if isinstance(prop, property):
+                prop.fset(self, value)
+            else:
+                object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        try:
+            if name not in self.normal_attributes and name.lower() == name:
+                if name.endswith("_list"):
+                    del self.contents[toVName(name, 5)]
+                else:
+                    del self.contents[toVName(name)]
+            else:
+                object.__delattr__(self, name)
+        except KeyError:
+            raise AttributeError(name)
+
+    def getChildValue(self, childName, default=None, childNumber=0):
+        """
+        Return a child's value (the first, by default), or None.
+        """
+        child = self.contents.get(toVName(childName))
+        if child is None:
+            return default
+        else:
+            return child[childNumber].value
+
+    def add(self, objOrName, group=None):
+        """
+        Add objOrName to contents, set behavior if it can be inferred.
+
+        If objOrName is a string, create an empty component or line based on
+        behavior. If no behavior is found for the object, add a ContentLine.
+
+        group is an optional prefix to the name of the object (see RFC 2425).
+        """
+        if isinstance(objOrName, VBase):
+            obj = objOrName
+            if self.behavior:
+                obj.parentBehavior = self.behavior
+                obj.autoBehavior(True)
+        else:
+            name = objOrName.upper()
+            try:
+                behavior, isComponent, _ = childBehaviors(self.behavior)[name]
+                if behavior is None:
+                    raise KeyError(name)
+                if isComponent:
+                    obj = Component(name)
+                else:
+                    obj = ContentLine(name, [], "", group)
+                obj.parentBehavior = self.behavior
+                obj.behavior = behavior
+                obj = obj.transformToNative()
+            except (KeyError, AttributeError):
+                obj = ContentLine(objOrName, [], "", group)
+            if obj.behavior is None and self.behavior is not None and isinstance(obj, ContentLine):
+                obj.behavior = self.behavior.defaultBehavior
+        self.contents.setdefault(contentsKey(obj.name), []).append(obj)
+        return obj
+
+    def remove(self, obj):
+        """
+        Remove obj from contents.
+        """
+        named = self.contents.get(obj.name.lower())
+        if named:
+            try:
+                named.remove(obj)
+                if len(named) == 0:
+                    del self.contents[obj.name.lower()]
+            except ValueError:
+                pass
+
+    def getChildren(self):
+        """
+        Return an iterable of all children.
+        """
+        for objList in self.contents.values():
+            yield from objList
+
+    def components(self):
+        """
+        Return an iterable of all Component children.
+        """
+        return (i for i in self.getChildren() if isinstance(i, Component))
+
+    def lines(self):
+        """
+        Return an iterable of all ContentLine children.
+        """
+        return (i for i in self.getChildren() if isinstance(i, ContentLine))
+
+    def sortChildKeys(self):
+        try:
+            first = [s for s in self.behavior.sortFirst if s in self.contents]
+        except AttributeError:
+            first = []
+        return first + sorted(k for k in self.contents if k not in first)
+
+    def getSortedChildren(self):
+        return [obj for k in self.sortChildKeys() for obj in self.contents[k]]
+
+    def setBehaviorFromVersionLine(self, versionLine):
+        """
+        Set behavior if one matches name, versionLine.value.
+        """
+        v = getBehavior(self.name, versionLine.value)
+        if v:
+            self.setBehavior(v)
+
+    def setBehavior(self, behavior, cascade=True):
+        """
+        Set behavior. If cascade is True, autoBehavior all descendants.
+
+        Child lines are looked up in childBehaviors(behavior) directly instead
+        of through their own autoBehavior, only child components recurse.
+        """
+        self.behavior = behavior
+        if not cascade:
+            return
+        table = childBehaviors(behavior) if behavior is not None else None
+        setattr_ = object.__setattr__
+        for objList in self.contents.values():
+            for obj in objList:
+                setattr_(obj, "parentBehavior", behavior)
+                if isinstance(obj, Component):
+                    obj.autoBehavior(True)
+                elif table is not None:
+                    knownChild = table.get(obj.name)
+                    if knownChild is None:
+                        lineBehavior = behavior.defaultBehavior
+                    elif knownChild[0] is None:
+                        continue
+                    else:
+                        lineBehavior = knownChild[0]
+                    setattr_(obj, "behavior", lineBehavior)
+                    obj.deferDecode()
+
+    def transformChildrenToNative(self, lazy=False):
+        """
+        Recursively replace children with their native representation.
+
+        Sort to get dependency order right, like vtimezone before vevent.
+
+        If lazy is True, components are transformed as usual, but ContentLines
+        are only transformed when they're first used.
+        """
+        for childArray in (self.contents[k] for k in self.sortChildKeys()):
+            for child in childArray:
+                if lazy and isinstance(child, ContentLine):
+                    child.deferNative()
+                else:
+                    child = child.transformToNative()
+                    child.transformChildrenToNative(lazy)
+
+    def transformChildrenFromNative(self, clearBehavior=True):
+        """
+        Recursively transform native children to vanilla representations.
+        """
+        for childArray in self.contents.values():
+            for child in childArray:
+                child = child.transformFromNative()
+                child.transformChildrenFromNative(clearBehavior)
+                if clearBehavior:
+                    child.behavior = None
+                    child.parentBehavior = None
+
+    def __str__(self):
+        if self.name:
+            return f"<{self.name}| {self.getSortedChildren()}>"
+        else:
+            return f"<*unnamed*| {self.getSortedChildren()}>"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def prettyPrint(self, level=0, tabwidth=3):
+        pre = " " * level * tabwidth
+        print(pre, self.name)
+        if isinstance(self, Component):
+            for line in self.getChildren():
+                line.prettyPrint(level + 1, tabwidth)
+
+
+# Component.contents keys of recent names, shared between components
+contentsKeys = {}
+
+
+def contentsKey(name):
+    """Return the key of name in Component.contents, name.lower()."""
+    key = contentsKeys.get(name)
+    if key is None:
+        if len(contentsKeys) >= HEAD_CACHE_SIZE:
+            contentsKeys.clear()
+        key = contentsKeys[name] = name.lower()
+    return key
+
+
+def dquoteEscape(param):
+    """
+    Return param, or "param" if ',' or ';' or ':' is in param.
+    """
+    if param.find('"') >= 0:
+        raise VObjectError("Double quotes aren't allowed in parameter values.")
+    for char in ",;:":
+        if param.find(char) >= 0:
+            return '"' + param + '"'
+    return param
+
+
+def foldOneLine(outbuf, input_, lineLength=75):
+    """
+    Write input_ to outbuf folded so no physical line is longer than
+    lineLength bytes, without breaking multi-byte UTF-8 sequences across
+    lines.
+
+    Lines shorter than lineLength characters are written as they are.  The
+    line is encoded once and written whole, as text, or as UTF-8 if outbuf
+    only takes bytes.
+    """
+    text = to_unicode(input_)
+    if len(text) >= lineLength:
+        text = "\r\n ".join(foldSegments(text, lineLength))
+    text += "\r\n"
+    try:
+        outbuf.write(text)
+    except TypeError:
+        outbuf.write(text.encode("utf-8"))
+
+
+def defaultSerialize(obj, buf, lineLength):
+    """
+    Encode and fold obj and its children, write to buf or return a string.
+
+    obj isn't changed, see encodedLine.  Parsed lines which haven't changed
+    are written as they were read, see ContentLine.originalText.  buf is
+    usually the OutputBuffer VBase.serialize made.
+    """
+    outbuf = buf or OutputBuffer()
+
+    if isinstance(obj, Component):
+        if obj.group is None:
+            groupString = ""
+        else:
+            groupString = obj.group + "."
+        if obj.useBegin:
+            foldOneLine(outbuf, f"{groupString}BEGIN:{obj.name}", lineLength)
+        for child in obj.getSortedChildren():
+            # validate is recursive, we only need to validate once
+            child.serialize(outbuf, lineLength, validate=False)
+        if obj.useBegin:
+            foldOneLine(outbuf, f"{groupString}END:{obj.name}", lineLength)
+
+    elif isinstance(obj, ContentLine):
+        text = obj.originalText()
+        if text is None:
+            obj = encodedLine(obj)
+            parts = [obj.name.upper()] if obj.group is None else [obj.group, ".", obj.name.upper()]
+            params = obj.params
+            for key in sorted(params):
+                parts.append(f";{key}={','.join(dquoteEscape(p) for p in params[key])}")
+            parts.append(f":{obj.value}")
+            text = "".join(parts)
+        foldOneLine(outbuf, text, lineLength)
+
+    return buf or outbuf.getvalue()
+
+
+class Stack:
+    def __init__(self):
+        self.stack = []
+
+    def __len__(self):
+        return len(self.stack)
+
+    def top(self):
+        if len(self) == 0:
+            return None
+        else:
+            return self.stack[-1]
+
+    def topName(self):
+        if len(self) == 0:
+            return None
+        else:
+            return self.stack[-1].name
+
+    def modifyTop(self, item):
+        top = self.top()
+        if top:
+            top.add(item)
+        else:
+            new = Component()
+            self.push(new)
+            new.add(item)  # add sets behavior for item and children
+
+    def push(self, obj):
+        self.stack.append(obj)
+
+    def pop(self):
+        return self.stack.pop()
+
+
+# --------------------------- version registry ---------------------------------
+__behaviorRegistry = {}
+
+
+def registerBehavior(behavior, name=None, default=False, id_=None):
+    """
+    Register the given behavior.
+
+    If default is True (or if this is the first version registered with this
+    name), the version will be the default if no id is given.
+    """
+    if not name:
+        name = behavior.name.upper()
+    if id_ is None:
+        id_ = behavior.versionString
+    if name in __behaviorRegistry:
+        if default:
+            __behaviorRegistry[name].insert(0, (id_, behavior))
+        else:
+            __behaviorRegistry[name].append((id_, behavior))
+    else:
+        __behaviorRegistry[name] = [(id_, behavior)]
+    behaviorTables.clear()
+
+
+# childBehaviors tables by parent behavior, built on first use
+behaviorTables = {}
+
+
+def childBehaviors(parentBehavior):
+    """
+    Return a dictionary mapping the names of parentBehavior's knownChildren
+    to (behavior, isComponent, defaultBehavior) tuples.
+
+    behavior is the registered behavior for the child, or None, isComponent
+    is behavior.isComponent, and defaultBehavior is the behavior the child's
+    unknown lines get.  Tables are cached until registerBehavior is called.
+    """
+    table = behaviorTables.get(parentBehavior)
+    if table is None:
+        table = {}
+        for name, knownChildTup in parentBehavior.knownChildren.items():
+            behavior = getBehavior(name, knownChildTup[2])
+            if behavior is None:
+                table[name] = (None, False, None)
+            else:
+                table[name] = (behavior, behavior.isComponent, behavior.defaultBehavior)
+        behaviorTables[parentBehavior] = table
+    return table
+
+
+def getBehavior(name, id_=None):
+    """
+    Return a matching behavior if it exists, or None.
+
+    If id is None, return the default for name.
+    """
+    name = name.upper()
+    if name in __behaviorRegistry:
+        if id_:
+            for n, behavior in __behaviorRegistry[name]:
+                if n == id_:
+                    return behavior
+
+        return __behaviorRegistry[name][0][1]
+    return None
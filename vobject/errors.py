@@ -0,0 +1,28 @@
+"""Exceptions raised while reading, validating and transforming vobjects."""
+
+
+class VObjectError(Exception):
+    def __init__(self, msg, lineNumber=None):
+        self.msg = msg
+        if lineNumber is not None:
+            self.lineNumber = lineNumber
+
+    def __str__(self):
+        if hasattr(self, "lineNumber"):
+            return f"At line {self.lineNumber}: {self.msg}"
+        else:
+            return repr(self.msg)
+
+
+class ParseError(VObjectError):
+    def __init__(self, msg, line_number=None, *, inputs=None):
+        super().__init__(msg, line_number)
+        self.inputs = inputs
+
+
+class ValidateError(VObjectError):
+    pass
+
+
+class NativeError(VObjectError):
+    pass
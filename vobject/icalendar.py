@@ -41,6 +41,7 @@ from .base import (
     logger,
     registerBehavior,
 )
+from .output import OutputBuffer
 
 # ------------------------------- Constants ------------------------------------
 DATENAMES = ("rdate", "exdate")
@@ -114,6 +115,8 @@ class TimezoneComponent(Component):
         The string used to refer to this timezone.
     """
 
+    __slots__ = ()
+
     def __init__(self, tzinfo=None, *args, **kwds):
         """
         Accept an existing Component or a tzinfo class.
@@ -402,6 +405,8 @@ class RecurringComponent(Component):
         A U{rruleset<https://moin.conectiva.com.br/DateUtil>}.
     """
 
+    __slots__ = ()
+
     def __init__(self, *args, **kwds):
         super().__init__(*args, **kwds)
 
@@ -948,6 +953,25 @@ class SemicolonMultiTextBehavior(MultiTextBehavior):
 
 
 # ------------------------ Registered Behavior subclasses ----------------------
+def findTzids(obj, table):
+    """
+    Add the tzids used by obj and its descendants to table, registering
+    their tzinfos, VTIMEZONEs are skipped.
+    """
+    if isinstance(obj, ContentLine) and (obj.behavior is None or not obj.behavior.forceUTC):
+        if getattr(obj, "tzid_param", None):
+            table[obj.tzid_param] = 1
+        else:
+            values = obj.value if type(obj.value) is list else (obj.value,)
+            for value in values:
+                tzid = TimezoneComponent.registerTzinfo(getattr(value, "tzinfo", None))
+                if tzid:
+                    table[tzid] = 1
+    for child in obj.getChildren():
+        if obj.name != "VTIMEZONE":
+            findTzids(child, table)
+
+
 class VCalendar2_0(VCalendarComponentBehavior):
     """
     vCalendar 2.0 behavior. With added VAVAILABILITY support.
@@ -986,27 +1010,6 @@ class VCalendar2_0(VCalendarComponentBehavior):
         if not hasattr(obj, "version"):
             obj.add(ContentLine("VERSION", [], cls.versionString))
         tzidsUsed = {}
-
-        def findTzids(obj, table):
-            if isinstance(obj, ContentLine) and (obj.behavior is None or not obj.behavior.forceUTC):
-                if getattr(obj, "tzid_param", None):
-                    table[obj.tzid_param] = 1
-                else:
-                    if type(obj.value) is list:
-                        for _ in obj.value:
-                            tzinfo = getattr(obj.value, "tzinfo", None)
-                            tzid = TimezoneComponent.registerTzinfo(tzinfo)
-                            if tzid:
-                                table[tzid] = 1
-                    else:
-                        tzinfo = getattr(obj.value, "tzinfo", None)
-                        tzid = TimezoneComponent.registerTzinfo(tzinfo)
-                        if tzid:
-                            table[tzid] = 1
-            for child in obj.getChildren():
-                if obj.name != "VTIMEZONE":
-                    findTzids(child, table)
-
         findTzids(obj, tzidsUsed)
         oldtzids = [toUnicode(x.tzid.value) for x in getattr(obj, "vtimezone_list", [])]
         for tzid in tzidsUsed:
@@ -1029,14 +1032,8 @@ class VCalendar2_0(VCalendarComponentBehavior):
         cls.generateImplicitParameters(obj)
         if validate:
             cls.validate(obj, raiseException=True)
-        if obj.isNative:
-            transformed = obj.transformFromNative()
-            undoTransform = True
-        else:
-            transformed = obj
-            undoTransform = False
 
-        outbuf = buf or io.StringIO()
+        outbuf = buf or OutputBuffer()
         if obj.group is None:
             groupString = ""
         else:
@@ -1076,16 +1073,123 @@ class VCalendar2_0(VCalendarComponentBehavior):
             child.serialize(outbuf, lineLength, validate=False)
         if obj.useBegin:
             foldOneLine(outbuf, f"{groupString}END:{obj.name}", lineLength)
-        out = buf or outbuf.getvalue()
-        if undoTransform:
-            obj.transformToNative()
-        print("unused variables", transformed)  # TODO: remove if not required
-        return out
+        return buf or outbuf.getvalue()
 
 
 registerBehavior(VCalendar2_0)
 
 
+# CalendarWriter states
+WRITER_NEW, WRITER_OPEN, WRITER_CLOSED = range(3)
+
+
+class CalendarWriter:
+    """
+    Write a VCALENDAR to stream one component at a time, so a large
+    calendar never has to be built in memory.
+
+    Use it as a context manager::
+
+        with CalendarWriter(stream) as writer:
+            for event in events:
+                writer.write(event)
+
+    The header is written by begin, on entering the context or with the first
+    component.  Each component is serialized and stream flushed as soon as
+    it's written.  The tzids components use are collected along the way, and
+    close writes a VTIMEZONE for each one not already written, then
+    END:VCALENDAR.  Parsers which need VTIMEZONEs before the components using
+    them, like readComponents with yieldAt, are better served by passing
+    timezones up front.
+
+    @ivar timezones:
+        tzinfos or VTIMEZONE components written with the header.
+    @ivar tzidsUsed:
+        The tzids used by the components written so far.
+    @ivar tzidsWritten:
+        The tzids of the VTIMEZONEs written so far.
+    @ivar state:
+        WRITER_NEW until the header is written, then WRITER_OPEN until
+        END:VCALENDAR is, then WRITER_CLOSED.
+    """
+
+    def __init__(self, stream, lineLength=75, validate=True, timezones=(), method=None, prodid=PRODID):
+        self.stream = stream
+        self.lineLength = lineLength
+        self.validate = validate
+        self.timezones = timezones
+        self.method = method
+        self.prodid = prodid
+        self.tzidsUsed = {}
+        self.tzidsWritten = set()
+        self.state = WRITER_NEW
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        # don't end a calendar cut short by an error as if it were complete
+        if excType is None:
+            self.close()
+
+    def begin(self):
+        """Write BEGIN:VCALENDAR, the calendar's properties and the timezones given up front."""
+        if self.state != WRITER_NEW:
+            return
+        self.state = WRITER_OPEN
+        stream, lineLength = self.stream, self.lineLength
+        foldOneLine(stream, "BEGIN:VCALENDAR", lineLength)
+        foldOneLine(stream, f"VERSION:{VCalendar2_0.versionString}", lineLength)
+        foldOneLine(stream, f"PRODID:{self.prodid}", lineLength)
+        if self.method is not None:
+            foldOneLine(stream, f"METHOD:{self.method}", lineLength)
+        for timezone in self.timezones:
+            if not isinstance(timezone, Component):
+                timezone = TimezoneComponent(tzinfo=timezone)
+            self.write(timezone)
+
+    def write(self, component):
+        """
+        Serialize component into the calendar, generating its implicit
+        parameters, like a UID, first.
+
+        A component without a behavior gets the one it would as a child of a
+        VCALENDAR.
+        """
+        if self.state == WRITER_CLOSED:
+            raise VObjectError("CalendarWriter is closed")
+        self.begin()
+        if component.behavior is None:
+            component.parentBehavior = VCalendar2_0
+            component.autoBehavior(True)
+        if component.name == "VTIMEZONE":
+            self.tzidsWritten.add(toUnicode(component.tzid.value))
+        component.serialize(self.stream, self.lineLength, self.validate)
+        if component.name != "VTIMEZONE":
+            findTzids(component, self.tzidsUsed)
+        self.flush()
+
+    def flush(self):
+        """Flush stream, if it can be."""
+        flush = getattr(self.stream, "flush", None)
+        if flush is not None:
+            flush()
+
+    def close(self):
+        """Write the VTIMEZONEs still needed and END:VCALENDAR, the stream is left open."""
+        if self.state == WRITER_CLOSED:
+            return
+        self.begin()
+        for tzid in self.tzidsUsed:
+            tzid = toUnicode(tzid)
+            if tzid != "UTC" and tzid not in self.tzidsWritten:
+                self.write(TimezoneComponent(tzinfo=getTzid(tzid)))
+        foldOneLine(self.stream, "END:VCALENDAR", self.lineLength)
+        self.state = WRITER_CLOSED
+        self.flush()
+
+
 class VTimezone(VCalendarComponentBehavior):
     """
     Timezone behavior.
@@ -1830,6 +1934,9 @@ def stringToTextValues(s, listSeparator=",", charList=None, strict=False):
     """
     Returns list of strings.
     """
+    if "\\" not in s and listSeparator not in s:
+        # nothing to unescape or split, keep s itself, it may be interned
+        return [s]
     if charList is None:
         charList = escapableCharList
 
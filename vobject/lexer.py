@@ -0,0 +1,559 @@
+"""Split streams into logical lines, and lines into their name, parameters and value."""
+
+import collections
+import io
+import mmap
+import os
+import re
+
+from .errors import ParseError
+
+# ----------------------------------- Constants --------------------------------
+CR = "\r"
+LF = "\n"
+CRLF = CR + LF
+SPACE = " "
+TAB = "\t"
+SPACEORTAB = SPACE + TAB
+
+
+# --------- Parsing functions and parseLine regular expressions ----------------
+
+# Note that underscore is not legal for names, it's included because
+# Lotus Notes uses it
+P_NAME = "[a-zA-Z0-9_-]+"  # 1*(ALPHA / DIGIT / "-")
+P_SAFE_CHAR = '[^";:,]'
+P_QSAFE_CHAR = '[^"]'
+
+# the combined Python string replacement and regex syntax is a little confusing;
+# remember that {foobar} is replaced with patterns['foobar'], so for instance
+# param_value is any number of safe_chars or any number of qsaf_chars surrounded
+# by double quotes.
+P_PARAM_VALUE = f' "{P_QSAFE_CHAR} * " | {P_SAFE_CHAR} * '
+
+# get a tuple of two elements, one will be empty, the other will have the value
+P_PARAM_VALUE_GROUPED = f' " ( {P_QSAFE_CHAR} * )" | ( {P_SAFE_CHAR} + ) '
+
+# get a parameter and its values, without any saved groups
+P_PARAM = rf"""
+; (?: {P_NAME} )                     # parameter name
+(?:
+    (?: = (?: {P_PARAM_VALUE} ) )?   # 0 or more parameter values, multiple
+    (?: , (?: {P_PARAM_VALUE} ) )*   # parameters are comma separated
+)*
+"""
+
+# get a parameter, saving groups for name and value (value still needs parsing)
+P_PARAMS_GROUPED = rf"""
+; ( {P_NAME} )
+
+(?: =
+    (
+        (?:   (?: {P_PARAM_VALUE} ) )?   # 0 or more parameter values, multiple
+        (?: , (?: {P_PARAM_VALUE} ) )*   # parameters are comma separated
+    )
+)?
+"""
+
+# get a full content line, break it up into group, name, parameters, and value
+P_LINE = rf"""
+^ ((?P<group> {P_NAME})\.)?(?P<name> {P_NAME}) # name group
+  (?P<params> ;?(?: {P_PARAM} )* )             # params group (may be empty)
+: (?P<value> .* )$                             # value group
+"""
+
+
+' "%(qsafe_char)s*" | %(safe_char)s* '  # what is this line?? - never assigned?
+
+param_values_re = re.compile(P_PARAM_VALUE_GROUPED, re.VERBOSE)
+params_re = re.compile(P_PARAMS_GROUPED, re.VERBOSE)
+name_re = re.compile(P_NAME)
+safe_chars_re = re.compile(f"{P_SAFE_CHAR}*")
+line_re = re.compile(P_LINE, re.DOTALL | re.VERBOSE)
+begin_re = re.compile("BEGIN", re.IGNORECASE)
+
+
+def parseParams(string):
+    """
+    Parse parameters
+    """
+    all_ = params_re.findall(string)
+    allParameters = []
+    for tup in all_:
+        paramList = [tup[0]]  # tup looks like (name, valuesString)
+        for pair in param_values_re.findall(tup[1]):
+            # pair looks like ('', value) or (value, '')
+            if pair[0] != "":
+                paramList.append(pair[0])
+            else:
+                paramList.append(pair[1])
+        allParameters.append(paramList)
+    return allParameters
+
+
+def isName(string):
+    """
+    Return True if string matches P_NAME.
+    """
+    return (string.isalnum() and string.isascii()) or name_re.fullmatch(string) is not None
+
+
+def parseHead(head):
+    """
+    Parse the part of a line before its value, if it has no quoted parameters.
+
+    Return a (name, params, group) tuple, with params as a tuple of tuples, or
+    None if head doesn't parse.  This is the fast path of parseLine, so it
+    must agree with line_re and parseParams.
+    """
+    segments = head.split(";")
+    nameGroup = segments[0]
+    if "." in nameGroup:
+        group, _, name = nameGroup.partition(".")
+        if not isName(group):
+            return None
+    else:
+        group, name = None, nameGroup
+    if not isName(name):
+        return None
+
+    params = []
+    if len(segments) > 1 and segments[1] == "":
+        # line_re allows one extra semicolon after the name
+        del segments[1]
+    for segment in segments[1:]:
+        paramName, equals, values = segment.partition("=")
+        if isName(paramName):
+            if equals:
+                # parseParams drops empty values
+                params.append((paramName, *(v for v in values.split(",") if v)))
+            else:
+                params.append((paramName,))
+        else:
+            # NAME,value is legal, but parseParams drops what follows the comma
+            match = name_re.match(segment)
+            if match is None or segment[match.end()] != ",":
+                return None
+            params.append((match.group(),))
+    # Underscores are replaced with dash to work around Lotus Notes
+    return name.replace("_", "-"), tuple(params), group
+
+
+def parseQuotedHead(line):
+    """
+    Split a line with quoted parameter values into its parts.
+
+    Return a (name, paramString, value, group) tuple, or None if line doesn't
+    match line_re.  Unlike line_re, this runs in linear time however broken
+    the line is, see scanParams.
+    """
+    match = name_re.match(line)
+    if match is None:
+        return None
+    group, name, pos = None, match.group(), match.end()
+    if line.startswith(".", pos):
+        match = name_re.match(line, pos + 1)
+        if match is None:
+            return None
+        group, name, pos = name, match.group(), match.end()
+
+    paramStart = pos
+    pos = scanParams(line, pos)
+    if pos < 0 or not line.startswith(":", pos):
+        return None
+    return name, line[paramStart:pos], line[pos + 1 :], group
+
+
+def scanParams(line, pos):
+    """
+    Return where the parameters of line, starting at pos after its name,
+    end, or -1 if they don't match line_re.
+
+    A parameter value is either quoted, which ends at the next double
+    quote, or runs to the next of ;:," so each character is looked at once.
+    """
+    if line.startswith(";", pos) and line[pos + 1 : pos + 2] in (";", ":"):
+        # line_re allows one extra semicolon after the name
+        pos += 1
+    while line.startswith(";", pos):
+        match = name_re.match(line, pos + 1)
+        if match is None:
+            return -1
+        pos = match.end()
+        while line[pos : pos + 1] in ("=", ","):
+            if line.startswith('"', pos + 1):
+                pos = line.find('"', pos + 2) + 1
+                if pos == 0:
+                    return -1
+            else:
+                end = safe_chars_re.match(line, pos + 1).end()
+                if line.startswith('"', end):
+                    if line[end - 1] != "=":
+                        return -1
+                    # a trailing = also delimits, a quoted value follows it
+                    end -= 1
+                pos = end
+    return pos
+
+
+# parsed heads of recent lines, most files only use a few distinct ones
+HEAD_CACHE_SIZE = 4096
+headCache = {}
+
+
+def splitLine(line, lineNumber=None, maxParams=None):
+    """
+    Parse line like parseLine, but return params as a tuple of tuples.
+
+    The params tuple may be shared between lines with the same name and
+    parameters, so it must not be modified.
+    """
+    head, colon, value = line.partition(":")
+    if not colon:
+        raise ParseError(f"Failed to parse line: {line}", lineNumber)
+    if '"' not in head:
+        # no quoted parameter values, so the first colon starts the value
+        parsed = headCache.get(head)
+        if parsed is None:
+            parsed = parseHead(head)
+            if parsed is None:
+                raise ParseError(f"Failed to parse line: {line}", lineNumber)
+            if len(headCache) >= HEAD_CACHE_SIZE:
+                headCache.clear()
+            headCache[head] = parsed
+        name, params, group = parsed
+    else:
+        parsed = parseQuotedHead(line)
+        if parsed is None:
+            raise ParseError(f"Failed to parse line: {line}", lineNumber)
+        # Underscores are replaced with dash to work around Lotus Notes
+        name, value, group = parsed[0].replace("_", "-"), parsed[2], parsed[3]
+        params = tuple(tuple(param) for param in parseParams(parsed[1]))
+    if maxParams is not None and len(params) > maxParams:
+        raise ParseError(f"Line has more than {maxParams} parameters", lineNumber)
+    return name, params, value, group
+
+
+def parseLine(line, lineNumber=None, maxParams=None):
+    """
+    Parse line
+
+    Parsing takes linear time in the length of line.  If maxParams is given,
+    raise ParseError if line has more than maxParams parameters.
+    """
+    name, params, value, group = splitLine(line, lineNumber, maxParams)
+    return name, [list(param) for param in params], value, group
+
+
+# logical line regular expressions
+
+P_LINEEND = r"(?:\r\n|\r|\n|$)"
+P_WRAP = rf"{P_LINEEND} [\t ]"
+P_LOGICALLINES = rf"""
+(
+   (?: [^\r\n] | {P_WRAP} )*
+   {P_LINEEND}
+)
+"""
+
+P_WRAPOREND = rf"({P_WRAP} | {P_LINEEND} )"
+
+wrap_re = re.compile(P_WRAPOREND, re.VERBOSE)
+logical_lines_re = re.compile(P_LOGICALLINES, re.VERBOSE)
+
+# number of characters pulled from the stream at a time when unfolding
+READ_CHUNK_SIZE = 64 * 1024
+
+testLines = """
+Line 0 text
+ , Line 0 continued.
+Line 1;encoding=quoted-printable:this is an evil=
+ evil=
+ format.
+Line 2 is a new line, it does not start with whitespace.
+"""
+
+
+class LineSplitter:
+    """
+    Split chunks of text or bytes into physical lines as they're pushed.
+
+    CRLF, CR and LF are all accepted as line endings, including a CRLF split
+    across two chunks.  Line endings are not included in the lines.
+
+    @ivar maxLength:
+        If not None, raise ParseError instead of buffering a line longer than
+        maxLength characters.
+    """
+
+    def __init__(self, maxLength=None):
+        self.maxLength = maxLength
+        self.pending = []
+        self.pendingLength = 0
+        self.cr, self.lf, self.crlf = CR, LF, CRLF
+
+    def push(self, chunk):
+        """Return a list of the lines completed by chunk."""
+        if type(chunk) is not type(self.lf):
+            self.cr, self.lf, self.crlf = (CR, LF, CRLF) if isinstance(chunk, str) else (b"\r", b"\n", b"\r\n")
+        cr, lf = self.cr, self.lf
+        pending = self.pending
+        if lf not in chunk and cr not in chunk:
+            # part of a long line, don't rescan it until its end shows up
+            pending.append(chunk)
+            self.pendingLength += len(chunk)
+            if self.maxLength is not None and self.pendingLength > self.maxLength:
+                raise ParseError(f"Line is longer than {self.maxLength} characters")
+            return []
+        if pending:
+            pending.append(chunk)
+            chunk = chunk[:0].join(pending)
+        # a trailing CR may be the first half of a CRLF
+        heldCR = chunk[-1:] == cr
+        if heldCR:
+            chunk = chunk[:-1]
+        lines = chunk.replace(self.crlf, lf).replace(cr, lf).split(lf)
+        self.pending = [lines.pop()]
+        if heldCR:
+            self.pending.append(cr)
+        self.pendingLength = len(self.pending[0])
+        return lines
+
+    def finish(self):
+        """Return a list of the lines left once all chunks have been pushed."""
+        pending, self.pending = self.pending, []
+        if not pending:
+            return []
+        rest = pending[0][:0].join(pending)
+        if not rest:
+            return []
+        lines = rest.replace(self.crlf, self.lf).replace(self.cr, self.lf).split(self.lf)
+        if not lines[-1]:
+            lines.pop()
+        return lines
+
+
+def getPhysicalLines(fp, chunkSize=READ_CHUNK_SIZE, maxLength=None):
+    """
+    Iterate through a stream, yielding one physical line at a time.
+
+    The stream is read chunkSize characters at a time, see LineSplitter.
+    Binary streams and mmaps are read the same way, yielding bytes.
+
+    If maxLength is given, raise ParseError instead of buffering a line
+    longer than maxLength characters.
+    """
+    splitter = LineSplitter(maxLength)
+    while True:
+        chunk = fp.read(chunkSize)
+        if not chunk:
+            break
+        yield from splitter.push(chunk)
+    yield from splitter.finish()
+
+
+FALLBACK_ENCODING = "latin-1"
+
+charset_re = re.compile(rb';\s*CHARSET\s*=\s*("[^"]*"|[^;,]*)', re.IGNORECASE)
+
+
+def decodeLine(line):
+    """
+    Decode a logical line read as bytes.
+
+    Use the line's CHARSET parameter if it has one, UTF-8 otherwise, and
+    FALLBACK_ENCODING if that fails, for 8-bit data in some other charset.
+    """
+    charset = "utf-8"
+    colon = line.find(b":")
+    head = line[:colon] if colon >= 0 else line
+    if b"=" in head:
+        match = charset_re.search(head)
+        if match:
+            charset = match.group(1).strip().strip(b'"').decode("ascii", "replace")
+    try:
+        return line.decode(charset)
+    except (LookupError, UnicodeDecodeError):
+        return line.decode(FALLBACK_ENCODING)
+
+
+# constants LineUnfolder uses for lines of str or bytes
+LineType = collections.namedtuple("LineType", "empty newline folds decode marker softBreak")
+STR_LINES = LineType("", LF, (SPACE, TAB), None, "quoted-printable", "=")
+BYTES_LINES = LineType(b"", b"\n", (b" ", b"\t"), decodeLine, b"quoted-printable", b"=")
+
+
+class LineUnfolder:
+    """
+    Unfold physical lines into logical lines as they're pushed.
+
+    Because many applications still use vCard 2.1, we have to deal with the
+    quoted-printable encoding for long lines, as well as the vCard 3.0 and
+    vCalendar line folding technique, a whitespace character at the start
+    of the line.
+
+    Lines of bytes are unfolded as bytes, which keeps multi-byte characters
+    split by a fold intact, and each logical line is then decoded with
+    decodeLine.
+
+    @ivar allowQP:
+        Whether quoted-printable soft line breaks are unfolded.
+    @ivar maxLineLength:
+        If not None, raise ParseError as soon as a logical line grows longer
+        than maxLineLength characters (bytes for lines of bytes).
+    """
+
+    def __init__(self, allowQP=True, maxLineLength=None):
+        self.allowQP = allowQP
+        self.maxLineLength = maxLineLength
+        self.parts = []
+        self.length = 0
+        self.lineNumber = 0
+        self.lineStartNumber = 0
+        # quoted-printable state, the end of the logical line is kept to spot
+        # QP markers across folds, and is None once a marker was seen
+        self.quotedPrintable = False
+        self.tail = None
+        # STR_LINES or BYTES_LINES, set from the first line
+        self.lineType = None
+
+    def flush(self):
+        """Return the logical line assembled so far, or None, and start a new one."""
+        lineType = self.lineType
+        logicalLine = None
+        if self.length > 0:
+            line = lineType.empty.join(self.parts)
+            logicalLine = (lineType.decode(line) if lineType.decode else line), self.lineStartNumber
+        self.parts, self.length, self.tail = [], 0, lineType.empty
+        self.lineStartNumber = self.lineNumber
+        return logicalLine
+
+    def push(self, line):
+        """
+        Push the next physical line.
+
+        Return a (logical line, line number) tuple if line completes one, None
+        otherwise.  The line number is that of the first physical line.
+        """
+        lineType = self.lineType
+        if lineType is None:
+            lineType = self.lineType = STR_LINES if isinstance(line, str) else BYTES_LINES
+            self.tail = lineType.empty
+        self.lineNumber += 1
+        if not self.allowQP:
+            if line[:1] in lineType.folds and self.parts:
+                text = line[1:]
+                logicalLine = None
+            else:
+                logicalLine = self.flush()
+                text = line
+        elif not line.rstrip():
+            logicalLine = self.flush()
+            self.quotedPrintable = False
+            return logicalLine
+        elif self.quotedPrintable:
+            text = lineType.newline + line
+            logicalLine = None
+            self.quotedPrintable = False
+        elif line[:1] in lineType.folds:
+            text = line[1:]
+            logicalLine = None
+        else:
+            logicalLine = self.flush()
+            text = line
+        self.parts.append(text)
+        self.length += len(text)
+        if self.maxLineLength is not None and self.length > self.maxLineLength:
+            raise ParseError(f"Line is longer than {self.maxLineLength} characters", self.lineStartNumber)
+
+        if self.allowQP:
+            # vCard 2.1 allows parameters to be encoded without a parameter name
+            # False positives are unlikely, but possible.
+            marker = lineType.marker
+            if self.tail is None:
+                window = text
+            else:
+                window = self.tail + text
+                self.tail = None if marker in window.lower() else window[-len(marker) :]
+            if window[-1:] == lineType.softBreak and self.tail is None:
+                self.quotedPrintable = True
+        return logicalLine
+
+    def finish(self):
+        """Return the last logical line, or None."""
+        if self.lineType is None:
+            # no line was pushed
+            return None
+        return self.flush()
+
+
+def getLogicalLines(fp, allowQP=True, chunkSize=READ_CHUNK_SIZE, maxLineLength=None):
+    """
+    Iterate through a stream, yielding one logical line at a time.
+
+    Because many applications still use vCard 2.1, we have to deal with the
+    quoted-printable encoding for long lines, as well as the vCard 3.0 and
+    vCalendar line folding technique, a whitespace character at the start
+    of the line.
+
+    Quoted-printable data will be decoded in the Behavior decoding phase.
+
+    The stream is read in chunks of chunkSize characters, so memory use
+    doesn't grow with the stream size.  Binary streams and mmaps are
+    unfolded as bytes, which keeps multi-byte characters split by a fold
+    intact, and each logical line is then decoded with decodeLine.
+
+    If maxLineLength is given, raise ParseError as soon as a logical line
+    grows longer than maxLineLength characters (bytes for binary streams).
+
+    Each logical line comes with the number of its first physical line,
+    counting from 1, with or without allowQP.  The quoted-printable path
+    used to number the first line 0, and a line after a blank one with the
+    blank line's number, so ParseError.lineNumber can differ from older
+    versions for such input.
+
+    # We're leaving this test in for awhile, because the unittest was ugly and dumb.
+    >>> from io import StringIO
+    >>> f=StringIO(testLines)
+    >>> for n, l in enumerate(getLogicalLines(f)):
+    ...     print("Line %s: %s" % (n, l[0]))
+    ...
+    Line 0: Line 0 text, Line 0 continued.
+    Line 1: Line 1;encoding=quoted-printable:this is an evil=
+     evil=
+     format.
+    Line 2: Line 2 is a new line, it does not start with whitespace.
+    """
+    unfolder = LineUnfolder(allowQP, maxLineLength)
+    for line in getPhysicalLines(fp, chunkSize, maxLineLength):
+        logicalLine = unfolder.push(line)
+        if logicalLine is not None:
+            yield logicalLine
+    logicalLine = unfolder.finish()
+    if logicalLine is not None:
+        yield logicalLine
+
+
+def openStream(streamOrString):
+    """
+    Return a (stream, closeStream) tuple for readComponents' first argument.
+
+    closeStream is the stream if it was opened here and must be closed by the
+    caller, None otherwise.
+    """
+    if isinstance(streamOrString, str):
+        return io.StringIO(streamOrString), None
+    if isinstance(streamOrString, (bytes, bytearray)):
+        return io.BytesIO(streamOrString), None
+    if isinstance(streamOrString, os.PathLike):
+        stream = openMapped(streamOrString)
+        return stream, stream
+    return streamOrString, None
+
+
+def openMapped(path):
+    """Return a read-only mmap of the file at path, or a BytesIO if it's empty."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return io.BytesIO()
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,125 @@
+"""Collect serialized text and fold it into lines."""
+
+import io
+
+
+def foldSegments(text, lineLength):
+    """
+    Return the pieces of text to join with folds, the first up to lineLength
+    bytes long and the others up to lineLength - 1, leaving room for the
+    space starting a continuation line.
+    """
+    encoded = text.encode("utf-8")
+    length = len(encoded)
+    if length == len(text):
+        # ASCII, where characters are bytes
+        if length <= lineLength:
+            return [text]
+        step = max(lineLength - 1, 1)
+        return [text[:lineLength]] + [text[start : start + step] for start in range(lineLength, length, step)]
+    segments = []
+    start, room = 0, lineLength
+    while start < length:
+        end = start + room
+        if end >= length:
+            segments.append(encoded[start:])
+            break
+        # back up to the first byte of a character
+        while end > start and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        if end <= start:
+            if not segments:
+                # no room for the first character, it goes after a fold
+                segments.append(b"")
+                room = lineLength - 1
+                continue
+            # a character wider than a continuation line gets one anyway
+            end = start + 1
+            while end < length and encoded[end] & 0xC0 == 0x80:
+                end += 1
+        segments.append(encoded[start:end])
+        start, room = end, lineLength - 1
+    return [segment.decode("utf-8") for segment in segments]
+
+
+# number of characters OutputBuffer collects before writing to its stream
+WRITE_BLOCK_SIZE = 64 * 1024
+
+
+def isBinaryStream(stream):
+    """Return True if stream takes bytes, False if it takes text, None if it can't be told."""
+    if isinstance(stream, io.TextIOBase):
+        return False
+    if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    mode = getattr(stream, "mode", None)
+    if isinstance(mode, str):
+        return "b" in mode
+    return None
+
+
+class OutputBuffer:
+    """
+    The buffer serialize writes to, which collects text in a list and
+    writes it to stream in blocks of about blockSize characters.
+
+    Whether stream takes text or UTF-8 bytes is decided once, from its type
+    or mode, or by whether the first block written as text raises TypeError.
+    Without a stream, getvalue returns everything written.
+
+    @ivar binary:
+        True if blocks are written to stream as bytes, False if as text, None
+        until known.
+    """
+
+    def __init__(self, stream=None, blockSize=WRITE_BLOCK_SIZE):
+        self.stream = stream
+        self.blockSize = blockSize
+        self.binary = None if stream is None else isBinaryStream(stream)
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.blockSize and self.stream is not None:
+            self.flush()
+
+    def flush(self):
+        """Write what's been collected to stream."""
+        if self.stream is None or not self.parts:
+            return
+        text = "".join(self.parts)
+        self.parts, self.size = [], 0
+        if self.binary is None:
+            try:
+                self.stream.write(text)
+                self.binary = False
+                return
+            except TypeError:
+                self.binary = True
+        self.stream.write(text.encode("utf-8") if self.binary else text)
+
+    def getvalue(self):
+        return "".join(self.parts)
+
+
+def encodedLine(line):
+    """
+    Return line transformed from its native value and encoded, as
+    defaultSerialize writes it.
+
+    line is returned as is if it's already encoded, otherwise a fork of it
+    is changed, so line and its native value are left alone.
+    """
+    if line._pending:
+        line._resolve()
+    native = line.isNative and line.behavior is not None and line.behavior.hasNative
+    if not native and (line.behavior is None or line._encoded):
+        return line
+    line = line.fork()
+    if native:
+        line = line.transformFromNative()
+    if line.behavior and not line.encoded:
+        line.behavior.encode(line)
+    return line
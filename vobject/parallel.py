@@ -0,0 +1,267 @@
+"""Parse large files with many components in a pool of worker processes."""
+
+import collections
+import concurrent.futures
+import mmap
+import os
+import pathlib
+import re
+
+from . import base, binary, builder
+
+MIN_CHUNK_SIZE = 1024 * 1024
+
+boundary_re = re.compile(rb"^(BEGIN|END):([^\r\n]*)", re.MULTILINE | re.IGNORECASE)
+
+
+def lineEnd(data, end):
+    """Return the offset just past the line ending at or after end."""
+    ending = data[end : end + 2]
+    if ending == b"\r\n":
+        return end + 2
+    if ending[:1] in (b"\n", b"\r"):
+        return end + 1
+    return end
+
+
+def scan(data):
+    """
+    Find the top level components in data, bytes or an mmap.
+
+    Return a list of (start, end, endLineStart, name, children) tuples, where
+    children is a list of (start, end, name) tuples for the component's
+    sub-components, or None if BEGIN and END lines don't match, in which case
+    data should be parsed serially so errors are reported as usual.
+    """
+    tops = []
+    stack = []
+    children = []
+    topStart = childStart = 0
+    for match in boundary_re.finditer(data):
+        name = match.group(2).strip().upper()
+        if match.group(1).upper() == b"BEGIN":
+            if not stack:
+                topStart = match.start()
+                children = []
+            elif len(stack) == 1:
+                childStart = match.start()
+            stack.append(name)
+        else:
+            if not stack or stack[-1] != name:
+                return None
+            stack.pop()
+            if len(stack) == 1:
+                children.append((childStart, lineEnd(data, match.end()), name))
+            elif not stack:
+                tops.append((topStart, lineEnd(data, match.end()), match.start(), name, children))
+    return tops
+
+
+def splitComponent(data, top, chunkSize):
+    """
+    Split a large top level component into chunks of its sub-components.
+
+    Each chunk is wrapped in the component's own BEGIN and END lines, its
+    properties, and the sub-components other sub-components may depend on,
+    like VTIMEZONEs, so every chunk parses on its own.  Return a list of
+    (ranges, yieldAt) tuples, ranges being the (start, end) offsets in data
+    making up the chunk, see readRanges.
+    """
+    start, end, endLineStart, name, children = top
+    behavior = base.getBehavior(name.decode("ascii", "replace"))
+    dependencies = behavior.sortFirst if behavior is not None else ()
+
+    preamble = [(start, children[0][0])]
+    batches = [[]]
+    batchSize = 0
+    previousEnd = children[0][0]
+    for childStart, childEnd, childName in children:
+        if data[previousEnd:childStart].strip():
+            preamble.append((previousEnd, childStart))
+        previousEnd = childEnd
+        if childName.decode("ascii", "replace").lower() in dependencies:
+            preamble.append((childStart, childEnd))
+            continue
+        if batchSize >= chunkSize:
+            batches.append([])
+            batchSize = 0
+        batches[-1].append((childStart, childEnd, childName))
+        batchSize += childEnd - childStart
+    if data[previousEnd:endLineStart].strip():
+        preamble.append((previousEnd, endLineStart))
+
+    tasks = []
+    for batch in batches:
+        body = mergeRanges((childStart, childEnd) for childStart, childEnd, _ in batch)
+        yieldAt = {childName.decode("ascii", "replace") for _, _, childName in batch}
+        tasks.append((preamble + body + [(endLineStart, end)], yieldAt))
+    return tasks
+
+
+def mergeRanges(ranges):
+    """Return a list of ranges, with each range starting where the previous one ends merged into it."""
+    merged = []
+    for start, end in ranges:
+        if merged and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def readRanges(path, ranges):
+    """Return the bytes of the file at path in ranges, a list of (start, end) offsets, joined."""
+    parts = []
+    with open(path, "rb") as f:
+        for start, end in ranges:
+            f.seek(start)
+            parts.append(f.read(end - start))
+    return b"".join(parts)
+
+
+def planJobs(data, chunkSize):
+    """
+    Return a list of (split, tasks) jobs covering data in order.
+
+    A job that isn't split has one task, parsing some whole top level
+    components.  A split job is one large component, parsed by splitComponent.
+    """
+    tops = scan(data)
+    if tops is None:
+        return [(False, [([(0, len(data))], None)])]
+    jobs = []
+    cut = 0
+    for top in tops:
+        start, end, _, _, children = top
+        if end - start > chunkSize and len(children) > 1:
+            if start > cut:
+                jobs.append((False, [([(cut, start)], None)]))
+            jobs.append((True, splitComponent(data, top, chunkSize)))
+            cut = end
+        elif end - cut >= chunkSize:
+            jobs.append((False, [([(cut, end)], None)]))
+            cut = end
+    if cut < len(data):
+        jobs.append((False, [([(cut, len(data))], None)]))
+    return jobs
+
+
+def parseChunk(path, ranges, yieldAt, options):
+    """
+    Parse ranges of the file at path in a worker process, return their
+    components in the binary format.
+    """
+    text = readRanges(path, ranges)
+    return binary.dumps(list(base.readComponents(text, yieldAt=yieldAt, **options)))
+
+
+def submitted(pool, path, jobs, options, splitOptions, limit):
+    """
+    Submit the tasks of jobs to pool in order, generating (split, last,
+    future) tuples, last being True for a job's last task.
+
+    At most limit tasks are submitted ahead of the one generated, so results
+    can't pile up faster than they're used.
+    """
+    pending = collections.deque()
+    for split, tasks in jobs:
+        for i, (ranges, yieldAt) in enumerate(tasks):
+            future = pool.submit(parseChunk, path, ranges, yieldAt, splitOptions if split else options)
+            pending.append((split, i == len(tasks) - 1, future))
+            if len(pending) >= limit:
+                yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+def rootMatches(data, tasks, where, allowQP):
+    """Return whether the component split into tasks, ranges of data, matches where."""
+    ranges, yieldAt = tasks[0]
+    text = b"".join(data[start:end] for start, end in ranges)
+    # only the root's own lines matter
+    properties = {name: () for name in yieldAt}
+    *_, root = base.readComponents(text, transform=False, allowQP=allowQP, yieldAt=yieldAt, properties=properties)
+    return builder.compileWhere(where)(root)
+
+
+def readComponents(
+    path,
+    workers=None,
+    validate=False,
+    transform=True,
+    ignoreUnreadable=False,
+    allowQP=False,
+    *,
+    chunkSize=None,
+    **options,
+):
+    """
+    Generate the components of the file at path, parsing it in parallel.
+
+    The file is split at the BEGIN lines of top level components like
+    VCARDs.  A top level component larger than chunkSize, like a big
+    VCALENDAR, is split at the BEGIN lines of its sub-components, each chunk
+    getting a copy of the component's properties and of the sub-components
+    others may depend on, like VTIMEZONEs.  Chunks are parsed by a pool of
+    workers processes, and components are generated in their original order,
+    with the same structure base.readComponents would give.  Other keyword
+    arguments are those of base.readComponents, except yieldAt, which
+    splitting sets.
+
+    chunkSize defaults to a quarter of each worker's share of the file, but
+    not less than MIN_CHUNK_SIZE bytes.  Folded lines can't be mistaken for
+    component boundaries, their continuations start with whitespace, but
+    splitting doesn't look inside quoted-printable values, so a line
+    starting with BEGIN: after a soft line break would be.
+
+    The file is mapped rather than read to find the boundaries, and workers
+    read their own chunks from it.  At most twice as many chunks as there
+    are workers are parsed ahead of the components generated.
+
+    where filters top level components as in base.readComponents, a callable
+    must be picklable.  A split component is checked before its chunks are
+    parsed, and skipped entirely if it doesn't match.
+    """
+    where = options.get("where")
+    options = dict(options, validate=validate, transform=transform, ignoreUnreadable=ignoreUnreadable, allowQP=allowQP)
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+    if chunkSize is None:
+        chunkSize = max(size // ((workers or 1) * 4), MIN_CHUNK_SIZE)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        jobs = planJobs(data, chunkSize)
+        if where is not None:
+            jobs = [(split, tasks) for split, tasks in jobs if not split or rootMatches(data, tasks, where, allowQP)]
+    # chunks of a split component are only filtered by rootMatches
+    splitOptions = dict(options, where=None)
+    if not jobs:
+        return
+    if len(jobs) == 1 and len(jobs[0][1]) == 1:
+        # not worth starting a pool
+        split, ((ranges, yieldAt),) = jobs[0]
+        source = pathlib.Path(path) if ranges == [(0, size)] else readRanges(path, ranges)
+        yield from base.readComponents(source, yieldAt=yieldAt, **(splitOptions if split else options))
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        limit = 2 * (workers or os.cpu_count() or 1)
+        root = None
+        for split, last, future in submitted(pool, path, jobs, options, splitOptions, limit):
+            components = binary.loads(future.result())
+            if options.get("lazyNative") and (not split or root is None):
+                # lines will look up their TZIDs in this process
+                binary.registerTimezones(components)
+            if not split:
+                yield from components
+                continue
+            # each chunk yields its sub-components, then its copy of the
+            # top level component, only the first copy is kept
+            if root is None:
+                root = components[-1]
+            for child in components[:-1]:
+                root.contents.setdefault(child.name.lower(), []).append(child)
+            if last:
+                yield root
+                root = None
@@ -0,0 +1,91 @@
+"""
+Save parsed components next to their source file, and load them back
+faster than parsing it again, like .pyc files for .ics files.
+"""
+
+import marshal
+import os
+import pathlib
+import pickle
+import tempfile
+
+from . import base, binary
+
+MAGIC = b"VOBJSNAP"
+# bumped when the snapshot format changes
+FORMAT_VERSION = 2
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+def snapshotPath(path):
+    """Return the path of the snapshot of the file at path."""
+    return os.fspath(path) + SNAPSHOT_SUFFIX
+
+
+def sourceKey(stat, options):
+    """Return what a snapshot of a file with os.stat result stat, parsed with options, is valid for."""
+    return (FORMAT_VERSION, stat.st_mtime_ns, stat.st_size, repr(sorted(options.items())))
+
+
+def load(path, key):
+    """Return the components snapshotted at path, or None if it's missing, stale or corrupt."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC or marshal.load(f) != key:
+                return None
+            return binary.loads(f.read())
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError, binary.FormatError):
+        return None
+
+
+def save(path, key, components, mode=0o644):
+    """
+    Snapshot components at path with permissions mode, replacing it
+    atomically.
+
+    Return False if the snapshot couldn't be written, in a read-only
+    directory or for values that can't be pickled for instance.
+    """
+    directory, name = os.path.split(path)
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=name, dir=directory or None)
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            marshal.dump(key, f)
+            f.write(binary.dumps(components))
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except (OSError, pickle.PicklingError, TypeError):
+        return False
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return True
+
+
+def readComponents(path, **options):
+    """
+    Return a list of the components of the file at path, as
+    base.readComponents would generate with the same keyword arguments.
+
+    The components are loaded from a snapshot next to the file if one was
+    saved for the file's current modification time and size and the same
+    options.  Otherwise the file is parsed and a new snapshot saved.
+    Options must have a stable repr, a callable where argument defeats the
+    snapshot.  Snapshots may contain pickled values, see binary.loads, so only
+    load them from directories as trusted as the code.
+    """
+    stat = os.stat(path)
+    key = sourceKey(stat, options)
+    snapshot = snapshotPath(path)
+    components = load(snapshot, key)
+    if components is None:
+        components = list(base.readComponents(pathlib.Path(path), **options))
+        # readable by whoever can read the source, like a .pyc
+        save(snapshot, key, components, stat.st_mode & 0o666)
+    elif options.get("lazyNative"):
+        binary.registerTimezones(components)
+    return components
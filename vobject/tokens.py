@@ -0,0 +1,93 @@
+"""Read streams as a flat sequence of tokens, without building components."""
+
+import collections
+
+from .builder import NO_LIMITS, checkLimits, logSkippedLine
+from .errors import ParseError, VObjectError
+from .lexer import getLogicalLines, openStream, splitLine
+
+# kinds of Tokens
+BEGIN, END, PROPERTY = "BEGIN", "END", "PROPERTY"
+
+Token = collections.namedtuple("Token", "kind name group params value lineNumber")
+Token.__doc__ = """
+A line of a stream, as generated by iterTokens.
+
+kind is BEGIN or END for the lines starting and ending a component, with
+the component's name as name and value None, and PROPERTY for every other
+line, including VERSION and PROFILE.  Names are upper case, params is a
+tuple of (name, value, ...) tuples which may be shared between tokens and
+must not be modified, and value is the encoded text of the line.
+"""
+
+
+def iterTokens(streamOrString, ignoreUnreadable=False, allowQP=False, limits=None):
+    """
+    Generate a Token for each logical line of a stream, without building
+    Components or ContentLines.
+
+    The stream is unfolded and tokenized as by readComponents, and the
+    arguments have the same meaning.  Unmatched END lines raise ParseError.
+    The stream is read as tokens are consumed, and a stream opened from a
+    path is closed when the generator is.
+    """
+    limits = limits if limits is not None else NO_LIMITS
+    stream, closeStream = openStream(streamOrString)
+    names = []
+    componentCount = 0
+    try:
+        for line, n in getLogicalLines(stream, allowQP, maxLineLength=limits.maxLineLength):
+            try:
+                name, params, value, group = splitLine(line, n, limits.maxParams)
+            except VObjectError as e:
+                if not ignoreUnreadable:
+                    raise
+                logSkippedLine(e)
+                continue
+            name = name.upper()
+            if name == "BEGIN":
+                componentCount += 1
+                checkLimits(limits, len(names) + 1, componentCount, n)
+                value = value.upper()
+                names.append(value)
+                yield Token(BEGIN, value, group, params, None, n)
+            elif name == "END":
+                value = value.upper()
+                if not names:
+                    raise ParseError(f"Attempted to end the {value} component but it was never opened", n)
+                if value != names[-1]:
+                    raise ParseError(f"{names[-1]} component wasn't closed", n)
+                names.pop()
+                yield Token(END, value, group, params, None, n)
+            else:
+                yield Token(PROPERTY, name, group, params, value, n)
+
+    except ParseError as e:
+        e.inputs = streamOrString
+        raise
+    finally:
+        if closeStream is not None:
+            closeStream.close()
+
+
+def parseEvents(
+    streamOrString, onBegin=None, onProperty=None, onEnd=None, ignoreUnreadable=False, allowQP=False, limits=None
+):
+    """
+    Parse a stream, calling back for each component and line, without
+    building Components or ContentLines.
+
+    onBegin(name, group) is called for BEGIN lines, onEnd(name) for END
+    lines, and onProperty(name, params, value, lineNumber) for every other
+    line, see Token for their meaning.  Any callback may be None.  Other
+    arguments are the same as for iterTokens.
+    """
+    for kind, name, group, params, value, n in iterTokens(streamOrString, ignoreUnreadable, allowQP, limits):
+        if kind is PROPERTY:
+            if onProperty is not None:
+                onProperty(name, params, value, n)
+        elif kind is BEGIN:
+            if onBegin is not None:
+                onBegin(name, group)
+        elif onEnd is not None:
+            onEnd(name)